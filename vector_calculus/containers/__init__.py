@@ -1,2 +1,4 @@
+from polynomial import *
 from vector import *
 from tensor import *
+from structured import *
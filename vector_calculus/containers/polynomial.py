@@ -0,0 +1,233 @@
+from sympy import Poly, Expr, Number, NumberSymbol, Integer, Rational, Float
+from sympy import symbols, S, Add
+from fractions import Fraction
+from numpy import asarray, broadcast_arrays, zeros
+
+# Polynomials are in cartesian coordinates
+__xyz__ = symbols('x, y, z')
+
+
+def _number(c):
+    '''Coefficient as Python number where exact, otherwise as it is.'''
+    if isinstance(c, Integer):
+        return int(c)
+    elif isinstance(c, Rational):
+        return Fraction(int(c.p), int(c.q))
+    elif isinstance(c, Float):
+        return float(c)
+    return c
+
+
+def _as_polynomial(f):
+    '''f as Polynomial, None if it is not polynomial in x, y, z.'''
+    if isinstance(f, Polynomial):
+        return f
+    if isinstance(f, (int, float, Fraction, Number, NumberSymbol)):
+        return Polynomial.constant(f)
+    if isinstance(f, Expr) and f.is_polynomial(*__xyz__):
+        return Polynomial.from_expr(f)
+    return None
+
+
+class Polynomial(object):
+    '''
+    Polynomial in x, y, z stored as sparse coefficients {(i, j, k): c} of
+    monomials x**i*y**j*z**k. Algebra and derivatives work on the
+    coefficients; the sympy expression is built only on demand.
+    '''
+
+    __slots__ = ('coefficients', '_hash')
+
+    # Sympy defers arithmetic with Polynomial to Polynomial
+    _op_priority = 20.0
+
+    def __init__(self, coefficients):
+        '''Polynomial from dictionary of exponents and coefficients.'''
+        object.__setattr__(self, 'coefficients',
+                           dict((tuple(e), c)
+                                for e, c in coefficients.iteritems() if c != 0))
+        object.__setattr__(self, '_hash', None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Polynomial is immutable')
+
+    def __reduce__(self):
+        '''Pickle by coefficients.'''
+        return (Polynomial, (self.coefficients, ))
+
+    @classmethod
+    def from_expr(cls, f):
+        '''Polynomial from sympy expression polynomial in x, y, z.'''
+        f = S(f)
+        assert f.is_polynomial(*__xyz__), 'Not a polynomial in x, y, z: %s' % f
+        return cls(dict((e, _number(c))
+                        for e, c in Poly(f, *__xyz__).terms()))
+
+    @classmethod
+    def constant(cls, c):
+        '''Constant polynomial.'''
+        return cls({(0, 0, 0): _number(S(c)) if isinstance(c, Expr) else c})
+
+    @classmethod
+    def sum(cls, polynomials):
+        '''Sum of polynomials (or numbers) by adding coefficients once.'''
+        coefficients = {}
+        for p in polynomials:
+            if not isinstance(p, Polynomial):
+                p = cls.constant(p)
+            for e, c in p.coefficients.iteritems():
+                coefficients[e] = coefficients.get(e, 0) + c
+        return cls(coefficients)
+
+    def as_expr(self):
+        '''Sympy expression of the polynomial.'''
+        x, y, z = __xyz__
+        return Add(*[S(c)*x**i*y**j*z**k
+                     for (i, j, k), c in sorted(self.coefficients.iteritems())])
+
+    def _sympy_(self):
+        '''Polynomial converts to Expr when mixed with sympy.'''
+        return self.as_expr()
+
+    @property
+    def degree(self):
+        '''Total degree, -1 for zero polynomial.'''
+        return max([sum(e) for e in self.coefficients] + [-1])
+
+    def is_constant(self):
+        '''True if polynomial has no x, y, z.'''
+        return all(e == (0, 0, 0) for e in self.coefficients)
+
+    def __hash__(self):
+        '''
+        Hash of the sympy expression; polynomials equal expressions of the
+        same polynomial so they must hash alike.
+        '''
+        if self._hash is None:
+            object.__setattr__(self, '_hash', hash(self.as_expr()))
+        return self._hash
+
+    def __eq__(self, other):
+        '''
+        Equality of coefficients; other objects are compared with the sympy
+        expression (structurally, as in sympy) consistently with the hash.
+        '''
+        if isinstance(other, Polynomial):
+            return self.coefficients == other.coefficients
+        return self.as_expr() == other
+
+    def __ne__(self, other):
+        '''Negation of ==.'''
+        return not self == other
+
+    def __str__(self):
+        '''String of expression.'''
+        return str(self.as_expr())
+
+    __repr__ = __str__
+
+    def _fallback(self, other, op):
+        '''Operation with other expression is done by sympy.'''
+        if isinstance(other, Expr):
+            return getattr(self.as_expr(), '__%s__' % op)(other)
+        return NotImplemented
+
+    def __add__(self, other):
+        '''Sum of polynomials. Other expressions give sympy expression.'''
+        p = _as_polynomial(other)
+        if p is None:
+            return self._fallback(other, 'add')
+        return Polynomial.sum([self, p])
+
+    __radd__ = __add__
+
+    def __neg__(self):
+        '''Multiply by -1.'''
+        return Polynomial(dict((e, -c)
+                               for e, c in self.coefficients.iteritems()))
+
+    def __sub__(self, other):
+        '''Difference of polynomials.'''
+        p = _as_polynomial(other)
+        if p is None:
+            return self._fallback(other, 'sub')
+        return Polynomial.sum([self, -p])
+
+    def __rsub__(self, other):
+        '''Difference of polynomials.'''
+        return -self + other
+
+    def __mul__(self, other):
+        '''Product of polynomials by convolution of coefficients.'''
+        p = _as_polynomial(other)
+        if p is None:
+            return self._fallback(other, 'mul')
+        coefficients = {}
+        for (i, j, k), c in self.coefficients.iteritems():
+            for (l, m, n), d in p.coefficients.iteritems():
+                e = (i+l, j+m, k+n)
+                coefficients[e] = coefficients.get(e, 0) + c*d
+        return Polynomial(coefficients)
+
+    __rmul__ = __mul__
+
+    def __div__(self, a):
+        '''Divide by number.'''
+        assert isinstance(a, (int, float, Fraction, Number, NumberSymbol)), \
+            'Polynomial can only be divided by number'
+        a = Fraction(a) if isinstance(a, int) else _number(S(a))
+        return Polynomial(dict((e, c/a)
+                               for e, c in self.coefficients.iteritems()))
+
+    __truediv__ = __div__
+
+    def __pow__(self, n):
+        '''Power by repeated squaring.'''
+        assert isinstance(n, int) and n >= 0, 'Only nonnegative integer powers'
+        result, power = Polynomial.constant(1), self
+        while n:
+            if n & 1:
+                result = result*power
+            power = power*power
+            n >>= 1
+        return result
+
+    def diff(self, var):
+        '''Partial derivative with respect to var, x, y, z or 0, 1, 2.'''
+        i = var if isinstance(var, int) else __xyz__.index(var)
+        coefficients = {}
+        for e, c in self.coefficients.iteritems():
+            if e[i] > 0:
+                e_new = list(e)
+                e_new[i] -= 1
+                coefficients[tuple(e_new)] = c*e[i]
+        return Polynomial(coefficients)
+
+    def atoms(self, *types):
+        '''Atoms of the expression.'''
+        return self.as_expr().atoms(*types)
+
+    def subs(self, values):
+        '''Substitute in the expression. Result is sympy expression.'''
+        return self.as_expr().subs(values)
+
+    def __call__(self, x, y=0, z=0):
+        '''Evaluate at points given by NumPy arrays.'''
+        x, y, z = broadcast_arrays(*[asarray(v, dtype=float) for v in (x, y, z)])
+        value = zeros(x.shape)
+        for (i, j, k), c in self.coefficients.iteritems():
+            value += float(c)*x**i*y**j*z**k
+        return value
+
+
+def add_terms(terms):
+    '''
+    Sum of terms. Polynomial if some term is a Polynomial and the others are
+    polynomial, otherwise one n-ary sympy Add.
+    '''
+    terms = list(terms)
+    if any(isinstance(t, Polynomial) for t in terms):
+        polynomials = map(_as_polynomial, terms)
+        if all(p is not None for p in polynomials):
+            return Polynomial.sum(polynomials)
+    return Add(*terms)
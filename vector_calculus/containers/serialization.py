@@ -0,0 +1,61 @@
+from sympy import srepr
+import sympy
+import cPickle as pickle
+from numpy import array, ndarray
+from numbers import Integral, Real
+from polynomial import Polynomial
+
+# Names in srepr strings
+__namespace__ = dict(vars(sympy))
+
+
+def _python_number(v):
+    '''Python or NumPy integer (real) as int (float), others as they are.'''
+    if isinstance(v, (sympy.Basic, bool)):
+        return v
+    if isinstance(v, Integral):
+        return int(v)
+    if isinstance(v, Real):
+        return float(v)
+    return v
+
+
+def pack_expressions(values):
+    '''
+    Compact form of (nested list of) numbers or sympy expressions. Python
+    or NumPy ints or floats (all of one type) are stored as NumPy array,
+    otherwise sympy expressions are stored as canonical srepr strings.
+    Polynomials pickle by their coefficients.
+    '''
+    if isinstance(values, ndarray) and values.dtype.kind in 'if':
+        return values.astype(int if values.dtype.kind == 'i' else float)
+    values = array(values, dtype=object)
+    values = array(map(_python_number, values.flat),
+                   dtype=object).reshape(values.shape)
+    types = set(type(v) for v in values.flat)
+    if types == set([int]) or types == set([float]):
+        return values.astype(types.pop())
+    return array([v if isinstance(v, (int, float, Polynomial))
+                  else srepr(sympy.S(v))
+                  for v in values.flat], dtype=object).reshape(values.shape)
+
+
+def unpack_expressions(packed):
+    '''Nested list of numbers or sympy expressions from pack_expressions.'''
+    if packed.dtype != object:
+        return packed.tolist()
+    return array([eval(v, __namespace__) if isinstance(v, str) else v
+                  for v in packed.flat],
+                 dtype=object).reshape(packed.shape).tolist()
+
+
+def to_bytes(obj):
+    '''Serialize obj with its compact pickle.'''
+    return pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+
+
+def from_bytes(data, cls=object):
+    '''Object of type cls from bytes of to_bytes.'''
+    obj = pickle.loads(data)
+    assert isinstance(obj, cls), 'Expected %s, got %s' % (cls, type(obj))
+    return obj
@@ -0,0 +1,198 @@
+from tensor import Tensor
+from polynomial import Polynomial, add_terms
+from serialization import pack_expressions, unpack_expressions
+from sympy import Number, NumberSymbol, Expr
+
+
+def _upper(dim, strict=False):
+    '''Indices (i, j) of the upper triangle.'''
+    return [(i, j) for i in range(dim) for j in range(i+strict, dim)]
+
+
+def _is_scalar(a):
+    '''True if a multiplies tensor componentwise.'''
+    return isinstance(a, (float, int, Number, NumberSymbol, Expr, Polynomial))
+
+
+class SymTensor(Tensor):
+    '''
+    Symmetric tensor. Only the upper triangle of blocks is used, the lower
+    one is its mirror image so each independent component is one object.
+    '''
+
+    __slots__ = ()
+
+    def __new__(cls, blocks):
+        dim = len(blocks)
+        return Tensor.__new__(cls, [[blocks[min(i, j)][max(i, j)]
+                                     for j in range(dim)]
+                                    for i in range(dim)])
+
+    @property
+    def components(self):
+        '''Independent components, upper triangle row by row.'''
+        return [self[i][j] for i, j in _upper(len(self))]
+
+    def applyfunc(self, f):
+        '''SymTensor of f applied to each independent component.'''
+        dim = len(self)
+        values = dict(((i, j), f(self[i][j])) for i, j in _upper(dim))
+        return SymTensor([[values.get((i, j), 0) for j in range(dim)]
+                          for i in range(dim)])
+
+    def __add__(self, B):
+        '''Sum of symmetric tensors is symmetric.'''
+        if isinstance(B, SymTensor):
+            return SymTensor([[self[i][j] + B[i][j] if i <= j else 0
+                               for j in range(len(self))]
+                              for i in range(len(self))])
+        return Tensor.__add__(self, B)
+
+    def __sub__(self, B):
+        '''Difference of symmetric tensors is symmetric.'''
+        if isinstance(B, SymTensor):
+            return SymTensor([[self[i][j] - B[i][j] if i <= j else 0
+                               for j in range(len(self))]
+                              for i in range(len(self))])
+        return Tensor.__sub__(self, B)
+
+    def __mul__(self, a):
+        '''Multiply by scalar or tensor.'''
+        if _is_scalar(a):
+            return self.applyfunc(lambda Aij: Aij*a)
+        return Tensor.__mul__(self, a)
+
+    def __rmul__(self, a):
+        '''Multiply by scalar or tensor from the left.'''
+        if isinstance(a, Tensor):
+            return Tensor.__mul__(a, self)
+        return self.applyfunc(lambda Aij: a*Aij)
+
+
+class SkewTensor(Tensor):
+    '''
+    Skew tensor. Only the strict upper triangle of blocks is used, the
+    diagonal is zero and the lower triangle is negated upper one.
+    '''
+
+    __slots__ = ()
+
+    def __new__(cls, blocks):
+        dim = len(blocks)
+        return Tensor.__new__(cls, [[blocks[i][j] if i < j else
+                                     (-blocks[j][i] if i > j else 0)
+                                     for j in range(dim)]
+                                    for i in range(dim)])
+
+    @property
+    def components(self):
+        '''Independent components, strict upper triangle row by row.'''
+        return [self[i][j] for i, j in _upper(len(self), strict=True)]
+
+    def applyfunc(self, f):
+        '''SkewTensor of f applied to each independent component.'''
+        dim = len(self)
+        values = dict(((i, j), f(self[i][j]))
+                      for i, j in _upper(dim, strict=True))
+        return SkewTensor([[values.get((i, j), 0) for j in range(dim)]
+                           for i in range(dim)])
+
+    def __add__(self, B):
+        '''Sum of skew tensors is skew.'''
+        if isinstance(B, SkewTensor):
+            return SkewTensor([[self[i][j] + B[i][j] if i < j else 0
+                                for j in range(len(self))]
+                               for i in range(len(self))])
+        return Tensor.__add__(self, B)
+
+    def __sub__(self, B):
+        '''Difference of skew tensors is skew.'''
+        if isinstance(B, SkewTensor):
+            return SkewTensor([[self[i][j] - B[i][j] if i < j else 0
+                                for j in range(len(self))]
+                               for i in range(len(self))])
+        return Tensor.__sub__(self, B)
+
+    def __mul__(self, a):
+        '''Multiply by scalar or tensor.'''
+        if _is_scalar(a):
+            return self.applyfunc(lambda Aij: Aij*a)
+        return Tensor.__mul__(self, a)
+
+    def __rmul__(self, a):
+        '''Multiply by scalar or tensor from the left.'''
+        if isinstance(a, Tensor):
+            return Tensor.__mul__(a, self)
+        return self.applyfunc(lambda Aij: a*Aij)
+
+
+class DiagTensor(SymTensor):
+    '''Diagonal tensor built from its diagonal.'''
+
+    __slots__ = ()
+
+    def __new__(cls, diagonal):
+        dim = len(diagonal)
+        return Tensor.__new__(cls, [[diagonal[i] if i == j else 0
+                                     for j in range(dim)]
+                                    for i in range(dim)])
+
+    def __reduce__(self):
+        '''Pickle by compact form of diagonal.'''
+        return (_unpickle_diagonal, (type(self),
+                                     pack_expressions(self.components)))
+
+    @classmethod
+    def sum(cls, tensors):
+        '''Sum of diagonal tensors. Each component is one n-ary Add.'''
+        tensors = list(tensors)
+        assert len(tensors) > 0, 'Need tensors to sum'
+        return cls([add_terms(diagonal) for diagonal in
+                    zip(*[T.components for T in tensors])])
+
+    @property
+    def components(self):
+        '''Diagonal.'''
+        return [self[i][i] for i in range(len(self))]
+
+    def applyfunc(self, f):
+        '''DiagTensor of f applied to each diagonal component.'''
+        return DiagTensor(map(f, self.components))
+
+    def __add__(self, B):
+        '''Sum of diagonal tensors is diagonal.'''
+        if isinstance(B, DiagTensor):
+            return DiagTensor([a + b for a, b in zip(self.components,
+                                                     B.components)])
+        return SymTensor.__add__(self, B)
+
+    def __sub__(self, B):
+        '''Difference of diagonal tensors is diagonal.'''
+        if isinstance(B, DiagTensor):
+            return DiagTensor([a - b for a, b in zip(self.components,
+                                                     B.components)])
+        return SymTensor.__sub__(self, B)
+
+    def __mul__(self, a):
+        '''Multiply by scalar, scale rows of tensor.'''
+        if isinstance(a, DiagTensor):
+            return DiagTensor([d*b for d, b in zip(self.components,
+                                                   a.components)])
+        elif isinstance(a, Tensor):
+            assert len(a) == len(self), 'Incompatible tensor lengths'
+            return Tensor([a[i]*d for i, d in enumerate(self.components)])
+        return SymTensor.__mul__(self, a)
+
+    def __rmul__(self, a):
+        '''Multiply by scalar, scale columns of tensor.'''
+        if isinstance(a, Tensor):
+            assert len(a) == len(self), 'Incompatible tensor lengths'
+            diagonal = self.components
+            return Tensor([[Aij*d for Aij, d in zip(Ai, diagonal)]
+                           for Ai in a])
+        return SymTensor.__rmul__(self, a)
+
+
+def _unpickle_diagonal(cls, packed):
+    '''DiagTensor from compact form of diagonal.'''
+    return cls(unpack_expressions(packed))
@@ -1,14 +1,24 @@
 from vector import Vector
 from sympy import Number
-from copy import copy
 from sympy import Matrix
-from sympy import Number, NumberSymbol, Expr
+from sympy import Number, NumberSymbol, Expr, Dummy
+from sympy import cse as sympy_cse, numbered_symbols
+from weakref import WeakValueDictionary
+from polynomial import Polynomial, add_terms
+from serialization import pack_expressions, unpack_expressions
+from serialization import to_bytes, from_bytes
 
 
 class Tensor(object):
     '''Symbolic rank-2 tensor.'''
 
-    def __init__(self, blocks):
+    __slots__ = ('A', '_hash', '__weakref__')
+
+    # Hash-consing. With interning on equal tensors are one instance
+    interning = False
+    _table = WeakValueDictionary()
+
+    def __new__(cls, blocks):
         '''Build tensor from list or list or Vectors'''
         assert len(blocks) == 2 or len(blocks) == 3,\
             'Only 2d and 3d tensor allowed'
@@ -16,8 +26,63 @@ class Tensor(object):
         assert all(len(block) == dim for block in blocks),\
             'Row length does not match dim = %d' % dim
         # Finally build
-        self.A = [block if isinstance(block, Vector) else Vector(block)
-                  for block in blocks]
+        A = tuple(block if isinstance(block, Vector) else Vector(block)
+                  for block in blocks)
+
+        if not cls.interning:
+            return cls._build(A)
+
+        key = (cls, A)
+        T = Tensor._table.get(key)
+        if T is None:
+            T = Tensor._table[key] = cls._build(A)
+        return T
+
+    @classmethod
+    def _build(cls, A):
+        '''New instance with rows A and their structural hash.'''
+        T = object.__new__(cls)
+        object.__setattr__(T, 'A', A)
+        object.__setattr__(T, '_hash', hash(A))
+        return T
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Tensor is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('Tensor is immutable')
+
+    def __hash__(self):
+        '''Hash of rows.'''
+        return self._hash
+
+    def __reduce__(self):
+        '''Pickle by compact form of components.'''
+        return (_unpickle_tensor, (type(self), pack_expressions(self.A)))
+
+    def to_bytes(self):
+        '''Compact serialization.'''
+        return to_bytes(self)
+
+    @classmethod
+    def from_bytes(cls, data):
+        '''Tensor from bytes of to_bytes.'''
+        return from_bytes(data, cls)
+
+    def __copy__(self):
+        '''Immutable so no copy is needed.'''
+        return self
+
+    def __deepcopy__(self, memo):
+        '''Immutable so no copy is needed.'''
+        return self
+
+    @classmethod
+    def sum(cls, tensors):
+        '''Sum of tensors. Each component is built as one n-ary Add.'''
+        tensors = list(tensors)
+        assert len(tensors) > 0, 'Need tensors to sum'
+        return cls([Vector.sum(rows) for rows in zip(*tensors)])
 
     def __getitem__(self, i):
         '''Extract component.'''
@@ -42,7 +107,7 @@ class Tensor(object):
     def __mul__(self, a):
         '''Multiply by scalar.'''
         # Scalar
-        if isinstance(a, (float, int, Number, NumberSymbol, Expr)):
+        if isinstance(a, (float, int, Number, NumberSymbol, Expr, Polynomial)):
             return Tensor([Ai*a for Ai in self])
         # Multiply two tensor
         elif isinstance(a, Tensor):
@@ -53,7 +118,8 @@ class Tensor(object):
             for i in range(n):
                 row = []
                 for j in range(n):
-                    row.append(sum([self[i][k]*a[k][j] for k in range(n)]))
+                    row.append(add_terms(self[i][k]*a[k][j]
+                                         for k in range(n)))
                 blocks.append(row)
             return Tensor(blocks)
         # No other
@@ -65,7 +131,7 @@ class Tensor(object):
         assert isinstance(n, int)
         assert n >= 0
         if n == 0:
-            return copy(self)
+            return self
         # Forget memory efficiency
         else:
             return reduce(lambda A, B: A*B, [self]*n)
@@ -83,14 +149,63 @@ class Tensor(object):
         return self*-1
 
     def __eq__(self, B):
-        '''Check equality. Depends on == in sympy so use with caution.'''
-        return all(Ai == Bi for Ai, Bi in zip(self, B))
+        '''
+        Tensors are equal if their rows are. Depends on == in sympy so use
+        with caution. Structured tensors hash by their rows too and so equal
+        plain tensors with the same components. Other types are not tensors.
+        '''
+        if not isinstance(B, Tensor):
+            return NotImplemented
+        return self is B or self.A == B.A
+
+    def __ne__(self, B):
+        '''Negation of ==.'''
+        equal = self.__eq__(B)
+        return equal if equal is NotImplemented else not equal
+
+    def applyfunc(self, f):
+        '''Tensor of f applied to each component.'''
+        return Tensor([[f(Aij) for Aij in Ai] for Ai in self])
 
     def subs(self, values):
         '''Substitute each component.'''
-        return Tensor([Ai.subs(values) for Ai in self])
+        return self.applyfunc(lambda Aij: Aij.subs(values)
+                              if isinstance(Aij, (Expr, Polynomial)) else Aij)
+
+    def to_polynomial(self):
+        '''Tensor with components stored as Polynomials.'''
+        return Tensor([Ai.to_polynomial() for Ai in self])
+
+    def as_expr(self):
+        '''Tensor with components as sympy expressions.'''
+        return Tensor([Ai.as_expr() for Ai in self])
+
+    def cse(self, symbols=None):
+        '''
+        Common subexpressions shared by all components. Returns list of
+        (symbol, expression) definitions, each depending only on the previous
+        ones, and the tensor of reduced components.
+        '''
+        if symbols is None:
+            symbols = numbered_symbols('c', cls=Dummy)
+        dim = len(self)
+        replacements, reduced = sympy_cse([Aij for Ai in self for Aij in Ai],
+                                          symbols)
+        return replacements, Tensor([reduced[i*dim:(i+1)*dim]
+                                     for i in range(dim)])
 
     # FIXME: Matrix is probably a better container
     def as_matrix(self):
         '''Return copy as sympy Matrix.'''
-        return Matrix(self.A)
+        return Matrix([list(Ai) for Ai in self.A])
+
+
+def _unpickle_tensor(cls, packed):
+    '''Tensor from compact form of components.'''
+    return cls(unpack_expressions(packed))
+
+
+def set_interning(on=True):
+    '''Turn hash-consing of Vectors and Tensors on or off.'''
+    Vector.interning = on
+    Tensor.interning = on
@@ -1,14 +1,80 @@
-from copy import copy
-from sympy import Matrix, Number, NumberSymbol, Expr
+from sympy import Matrix, Number, NumberSymbol, Expr, sympify, Dummy
+from sympy import cse as sympy_cse, numbered_symbols
+from weakref import WeakValueDictionary
+from polynomial import Polynomial, add_terms
+from serialization import pack_expressions, unpack_expressions
+from serialization import to_bytes, from_bytes
 
 
 class Vector(object):
     '''Symbolic vector.'''
 
-    def __init__(self, block):
-        '''Vector is a fancy list'''
+    __slots__ = ('u', '_hash', '__weakref__')
+
+    # Hash-consing. With interning on equal vectors are one instance
+    interning = False
+    _table = WeakValueDictionary()
+
+    def __new__(cls, block):
+        '''Vector is an immutable tuple of sympy expressions.'''
         assert len(block) == 2 or len(block) == 3, 'Only 2d and 3d vectors'
-        self.u = copy(block)
+        u = tuple(ui if isinstance(ui, Polynomial) else sympify(ui)
+                  for ui in block)
+
+        if not cls.interning:
+            return cls._build(u)
+
+        key = (cls, u)
+        v = Vector._table.get(key)
+        if v is None:
+            v = Vector._table[key] = cls._build(u)
+        return v
+
+    @classmethod
+    def _build(cls, u):
+        '''New instance with components u and their structural hash.'''
+        v = object.__new__(cls)
+        object.__setattr__(v, 'u', u)
+        object.__setattr__(v, '_hash', hash(u))
+        return v
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Vector is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('Vector is immutable')
+
+    def __hash__(self):
+        '''Hash of components.'''
+        return self._hash
+
+    def __reduce__(self):
+        '''Pickle by compact form of components.'''
+        return (_unpickle_vector, (type(self), pack_expressions(self.u)))
+
+    def to_bytes(self):
+        '''Compact serialization.'''
+        return to_bytes(self)
+
+    @classmethod
+    def from_bytes(cls, data):
+        '''Vector from bytes of to_bytes.'''
+        return from_bytes(data, cls)
+
+    def __copy__(self):
+        '''Immutable so no copy is needed.'''
+        return self
+
+    def __deepcopy__(self, memo):
+        '''Immutable so no copy is needed.'''
+        return self
+
+    @classmethod
+    def sum(cls, vectors):
+        '''Sum of vectors. Each component is built as one n-ary Add.'''
+        vectors = list(vectors)
+        assert len(vectors) > 0, 'Need vectors to sum'
+        return cls([add_terms(components) for components in zip(*vectors)])
 
     def __getitem__(self, i):
         '''Extract component.'''
@@ -20,7 +86,7 @@ class Vector(object):
 
     def __str__(self):
         '''String representation.'''
-        return self.u.__str__()
+        return list(self.u).__str__()
 
     def __add__(self, v):
         '''Add two vectors.'''
@@ -32,7 +98,7 @@ class Vector(object):
 
     def __mul__(self, a):
         '''Multiply by scalar.'''
-        if isinstance(a, (int, float, Number, NumberSymbol, Expr)):
+        if isinstance(a, (int, float, Number, NumberSymbol, Expr, Polynomial)):
             return Vector([ui*a for ui in self])
         else:
             return NotImplemented
@@ -50,15 +116,50 @@ class Vector(object):
         return self*-1
 
     def __eq__(self, v):
-        '''Check equality. Depends on == in sympy so use with caution.'''
-        return all(ui == vi for ui, vi in zip(self, v))
+        '''
+        Vectors are equal if their components are. Depends on == in sympy so
+        use with caution. Other types are not vectors.
+        '''
+        if type(v) is not type(self):
+            return NotImplemented
+        return self is v or self.u == v.u
+
+    def __ne__(self, v):
+        '''Negation of ==.'''
+        equal = self.__eq__(v)
+        return equal if equal is NotImplemented else not equal
 
     def subs(self, values):
         '''Substitute each component.'''
-        return Vector([ui.subs(values) if isinstance(ui, Expr) else ui
+        return Vector([ui.subs(values)
+                       if isinstance(ui, (Expr, Polynomial)) else ui
                        for ui in self])
     
+    def to_polynomial(self):
+        '''Vector with components stored as Polynomials.'''
+        return Vector(map(Polynomial.from_expr, self))
+
+    def as_expr(self):
+        '''Vector with components as sympy expressions.'''
+        return Vector([sympify(ui) for ui in self])
+
+    def cse(self, symbols=None):
+        '''
+        Common subexpressions shared by components. Returns list of
+        (symbol, expression) definitions, each depending only on the previous
+        ones, and the vector of reduced components.
+        '''
+        if symbols is None:
+            symbols = numbered_symbols('c', cls=Dummy)
+        replacements, reduced = sympy_cse(list(self.u), symbols)
+        return replacements, Vector(reduced)
+
     # FIXME: Maybe start with Matrix
     def as_matrix(self):
         '''Return copy as sympy Matrix.'''
         return Matrix(self.u)
+
+
+def _unpickle_vector(cls, packed):
+    '''Vector from compact form of components.'''
+    return cls(unpack_expressions(packed))
@@ -3,3 +3,11 @@ from surface_measure import *
 from volume_measure import *
 from parametrized_set import *
 from parameter_domain import ParameterDomain
+from measure import clear_term_cache
+from quadrature import *
+from adaptive import *
+from mesh import *
+from parallel import *
+from asynchronous import *
+from export import *
+from chebyshev import *
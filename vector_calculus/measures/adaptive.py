@@ -0,0 +1,127 @@
+from parametrized_set import SimplexSet, CartesianSet
+from quadrature import simplex_rule, cube_rule, box_map
+from numpy import array, eye, diag, vstack
+from numpy.linalg import det
+from itertools import product
+import heapq
+
+# Vertices of reference simplices in the parameter domain of SimplexSet
+__simplices__ = {1: [[0], [1]],
+                 2: [[0, 0], [1, 0], [0, 1]],
+                 3: [[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1]]}
+
+
+def _simplex_map(vertices):
+    '''Affine map (A, c) of reference simplex to simplex with vertices.'''
+    vertices = array(vertices, dtype=float)
+    return (vertices[1:] - vertices[0]).T, vertices[0]
+
+
+def red_refinement(tdim):
+    '''
+    Affine maps (A, c) of the reference simplex to its children in red
+    refinement: 2 halves of line, 4 triangles, 8 tetrahedra. The octahedron
+    left after cutting corners of the tetrahedron is split along one
+    diagonal.
+    '''
+    v = array(__simplices__[tdim], dtype=float)
+    m = lambda i, j: 0.5*(v[i] + v[j])
+    if tdim == 1:
+        children = [[v[0], m(0, 1)], [m(0, 1), v[1]]]
+    elif tdim == 2:
+        children = [[v[0], m(0, 1), m(0, 2)], [m(0, 1), v[1], m(1, 2)],
+                    [m(0, 2), m(1, 2), v[2]], [m(1, 2), m(0, 2), m(0, 1)]]
+    else:
+        children = [[v[0], m(0, 1), m(0, 2), m(0, 3)],
+                    [m(0, 1), v[1], m(1, 2), m(1, 3)],
+                    [m(0, 2), m(1, 2), v[2], m(2, 3)],
+                    [m(0, 3), m(1, 3), m(2, 3), v[3]],
+                    # Octahedron around diagonal m02-m13
+                    [m(0, 1), m(0, 2), m(0, 3), m(1, 3)],
+                    [m(0, 1), m(0, 2), m(1, 2), m(1, 3)],
+                    [m(0, 2), m(0, 3), m(1, 3), m(2, 3)],
+                    [m(0, 2), m(1, 2), m(1, 3), m(2, 3)]]
+    return [_simplex_map(child) for child in children]
+
+
+def bisection(tdim):
+    '''
+    Affine maps (A, c) of the reference cube [-1, 1]^tdim to its 2^tdim
+    children obtained by bisecting every edge.
+    '''
+    return [(0.5*eye(tdim), array(corner) + 0.5)
+            for corner in product(*[[-1., 0.]]*tdim)]
+
+
+def _reference_cell(pset):
+    '''
+    Rule of given degree on the reference cell of parametrized set, affine
+    maps of the reference cell to its children and the affine map of the
+    reference cell to the parameter domain.
+    '''
+    tdim = pset.tdim
+    if isinstance(pset, SimplexSet):
+        return simplex_rule, red_refinement(tdim), (eye(tdim), array([0.]*tdim))
+    elif isinstance(pset, CartesianSet):
+        return cube_rule, bisection(tdim), (eye(tdim), array([0.]*tdim))
+    # Parameter domain which is a box is a rescaled reference cube
+    box = box_map(pset.pdomain)
+    if box is None:
+        raise NotImplementedError('No refinement of %s' % type(pset))
+    scale, shift = box
+    return cube_rule, bisection(tdim), (diag(scale), shift)
+
+
+def adaptive_quadrature(measure, integrand, tol=1E-8, degree=4,
+                        max_cells=10000):
+    '''
+    Integrate numerically with adaptive refinement of the parameter domain
+    of the measure. Rules of degree and degree+2 give the estimate and the
+    error indicator of every cell. The cell with the largest error is
+    refined (red refinement of simplices, bisection of boxes) until the sum
+    of cell errors is below tol or there are max_cells cells. Children are
+    mapped by composing the parent's affine map with the fixed maps of the
+    reference children. Returns the estimate and the error indicator.
+    '''
+    pset = measure.domain
+    rule, children, root = _reference_cell(pset)
+    tdim = pset.tdim
+    # Both rules are evaluated with one call
+    low, high = rule(tdim, degree), rule(tdim, degree + 2)
+    ref_points = vstack([low[0], high[0]])
+    nlow = len(low[1])
+
+    def integrate(cell):
+        '''Estimate and error of integral over cell with map (A, c).'''
+        A, c = cell
+        points = ref_points.dot(A.T) + c
+        dA = abs(det(A))
+        values = [measure._quadrature(integrand, points[:nlow], low[1]*dA),
+                  measure._quadrature(integrand, points[nlow:], high[1]*dA)]
+        return values[1], float(abs(values[1] - values[0]).max())
+
+    # Heap of (-error, count, estimate, cell), count breaks ties
+    estimate, error = integrate(root)
+    heap = [(-error, 0, estimate, root)]
+    total, count = error, 1
+    while total > tol and len(heap) + len(children) - 1 <= max_cells:
+        error, _, estimate, (A, c) = heapq.heappop(heap)
+        total += error
+        for Ak, ck in children:
+            child = (A.dot(Ak), A.dot(ck) + c)
+            child_estimate, child_error = integrate(child)
+            heapq.heappush(heap, (-child_error, count, child_estimate, child))
+            total += child_error
+            count += 1
+
+    # Sum the cells in the order of creation
+    heap.sort(key=lambda item: item[1])
+    return sum(item[2] for item in heap), sum(-item[0] for item in heap)
+
+# -----------------------------------------------------------------------------
+
+
+if __name__ == '__main__':
+    # Children cover the parent
+    print sum(abs(det(A)) for A, c in red_refinement(3))
+    print sum(abs(det(A)) for A, c in bisection(2))
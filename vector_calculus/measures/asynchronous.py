@@ -0,0 +1,195 @@
+from parallel import Executor
+from multiprocessing import TimeoutError
+from threading import Event, Lock
+from time import time
+
+
+class CancelledError(Exception):
+    '''Result of cancelled integral was requested.'''
+    pass
+
+
+def _integrate(args):
+    '''Job computing integrand*measure. Errors are returned, not raised.'''
+    integrand, measure = args
+    try:
+        return True, integrand*measure
+    except Exception as e:
+        return False, e
+
+
+class _Integral(object):
+    '''Integral in flight shared by all identical requests.'''
+
+    def __init__(self, key):
+        self.key = key
+        self.event = Event()
+        self.ok = None
+        self.value = None
+        self.futures = []
+
+
+class IntegralFuture(object):
+    '''
+    Handle of integral computed in the background. Identical requests share
+    one computation; cancelling a handle detaches it from the computation.
+    '''
+
+    def __init__(self, integral, integrator, timeout=None):
+        self._integral = integral
+        self._integrator = integrator
+        self._deadline = None if timeout is None else time() + timeout
+        self._cancelled = False
+        self._callbacks = []
+
+    def done(self):
+        '''True if the result is ready or the handle was cancelled.'''
+        return self._cancelled or self._integral.event.is_set()
+
+    def cancelled(self):
+        '''True if the handle was cancelled.'''
+        return self._cancelled
+
+    def cancel(self):
+        '''
+        Detach from the computation. When no handle waits for it anymore the
+        computation is forgotten so that new requests start afresh. Running
+        sympy integration cannot be interrupted, it runs to the end.
+        '''
+        if self.done():
+            return False
+        self._cancelled = True
+        self._integrator._detach(self)
+        return True
+
+    def result(self, timeout=None):
+        '''
+        Value of the integral. Waits at most timeout seconds, or until the
+        deadline of the request, and raises TimeoutError after that. The
+        request is cancelled when its deadline has passed.
+        '''
+        if self._cancelled:
+            raise CancelledError('Integral was cancelled')
+        if self._deadline is not None:
+            remaining = max(self._deadline - time(), 0)
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        if not self._integral.event.wait(timeout):
+            if self._deadline is not None and time() >= self._deadline:
+                self.cancel()
+            raise TimeoutError('Integral not computed in time')
+
+        if not self._integral.ok:
+            raise self._integral.value
+        return self._integral.value
+
+    def add_done_callback(self, fn):
+        '''Call fn(future) when the result is ready, e.g. to wake event loop.'''
+        with self._integrator._lock:
+            if not self._integral.event.is_set():
+                self._callbacks.append(fn)
+                return
+        fn(self)
+
+
+class AsyncIntegrator(object):
+    '''
+    Computes integrals in the background on Executor so that the calling
+    thread, e.g. event loop, is not blocked by sympy. Concurrent requests for
+    the same integrand and measure are coalesced into one computation.
+    '''
+
+    def __init__(self, executor=None):
+        '''Integrator with Executor, by default with a thread per CPU.'''
+        self.executor = Executor() if executor is None else executor
+        self._inflight = {}
+        self._lock = Lock()
+
+    def submit(self, integrand, measure, timeout=None):
+        '''Start computing integrand*measure. Returns IntegralFuture.'''
+        # Measures compare by their compact serialization
+        key = (integrand, type(measure), measure.to_bytes())
+        with self._lock:
+            integral = self._inflight.get(key)
+            if integral is None:
+                integral = self._inflight[key] = _Integral(key)
+                self.executor.pool.apply_async(
+                    _integrate, ((integrand, measure), ),
+                    callback=lambda result: self._finish(integral, result))
+            future = IntegralFuture(integral, self, timeout)
+            integral.futures.append(future)
+        return future
+
+    def map(self, pairs, timeout=None):
+        '''Start computing integrand*measure for (integrand, measure) pairs.'''
+        return [self.submit(integrand, measure, timeout)
+                for integrand, measure in pairs]
+
+    def _finish(self, integral, result):
+        '''Store result of computation and notify its handles.'''
+        with self._lock:
+            if self._inflight.get(integral.key) is integral:
+                del self._inflight[integral.key]
+            integral.ok, integral.value = result
+            integral.event.set()
+            callbacks = [(future, fn) for future in integral.futures
+                         for fn in future._callbacks]
+        for future, fn in callbacks:
+            fn(future)
+
+    def _detach(self, future):
+        '''Remove cancelled handle, forget computation nobody waits for.'''
+        with self._lock:
+            integral = future._integral
+            if future in integral.futures:
+                integral.futures.remove(future)
+            if not integral.futures and \
+                    self._inflight.get(integral.key) is integral:
+                del self._inflight[integral.key]
+
+    def close(self):
+        '''Shut down the executor.'''
+        self.executor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+# Integrator used when none is given, created on first use
+__integrator__ = []
+
+
+def default_integrator():
+    '''Shared AsyncIntegrator with thread Executor.'''
+    if not __integrator__:
+        __integrator__.append(AsyncIntegrator())
+    return __integrator__[0]
+
+
+def aintegrate(integrand, measure, timeout=None, integrator=None):
+    '''Start computing integrand*measure in the background.'''
+    integrator = default_integrator() if integrator is None else integrator
+    return integrator.submit(integrand, measure, timeout)
+
+
+def aintegrate_many(pairs, timeout=None, integrator=None):
+    '''Start computing integrals of (integrand, measure) pairs.'''
+    integrator = default_integrator() if integrator is None else integrator
+    return integrator.map(pairs, timeout)
+
+# -----------------------------------------------------------------------------
+
+
+if __name__ == '__main__':
+    from volume_measure import dV
+    from sympy import symbols, sin
+
+    x, y = symbols('x, y')
+    dx = dV([[0, 1], [0, 2]])
+    with AsyncIntegrator() as integrator:
+        futures = integrator.map([(sin(x)*y, dx), (sin(x)*y, dx), (x, dx)])
+        # Duplicates share one computation
+        print futures[0]._integral is futures[1]._integral
+        print [future.result() for future in futures]
@@ -0,0 +1,186 @@
+from vector_calculus.operators import lambdify_field, xyz
+from parametrized_set import CartesianSet
+from numpy import asarray, cos, pi, arange, meshgrid, broadcast_to, moveaxis
+from numpy import broadcast_arrays
+from numpy import tensordot, zeros, abs as npabs
+from numpy.polynomial.chebyshev import chebval, chebval2d, chebval3d, chebder
+from numpy.polynomial.legendre import leggauss
+from sympy import Expr
+
+__chebval__ = {1: chebval, 2: chebval2d, 3: chebval3d}
+
+
+def _lobatto_transform(n):
+    '''
+    Matrix of coefficients of degree n Chebyshev interpolant from values at
+    Chebyshev-Lobatto points cos(pi*j/n), j = 0, ..., n (discrete cosine
+    transform).
+    '''
+    j = arange(n + 1)
+    M = cos(pi*j[:, None]*j[None, :]/n)*2./n
+    M[:, 0] *= 0.5
+    M[:, -1] *= 0.5
+    M[0] *= 0.5
+    M[-1] *= 0.5
+    return M
+
+
+def _apply(M, values, axis):
+    '''Apply matrix M to values along axis.'''
+    return moveaxis(tensordot(M, values, axes=([1], [axis])), 0, axis)
+
+
+def _evaluate(f, points):
+    '''Values of field or NumPy function at broadcastable coordinates.'''
+    if callable(f) and not isinstance(f, Expr):
+        return asarray(f(*points), dtype=float)
+    return lambdify_field(f, xyz[:len(points)])(*points)
+
+
+class ChebyshevSurrogate(object):
+    '''
+    Tensor product Chebyshev approximation of scalar, Vector or Tensor field
+    (or NumPy function of x, y[, z]) over Interval, Rectangle or Box. The
+    field is evaluated once on Chebyshev-Lobatto grids whose degree is doubled
+    along each axis until the trailing coefficients along it are below tol
+    relative to the largest one. Evaluation, integration and derivatives
+    then work with the coefficients. Coefficients have the field axes first.
+    '''
+
+    def __init__(self, field, domain, tol=1E-10, max_degree=128):
+        '''Build the surrogate, see error for the estimate of its error.'''
+        if isinstance(domain, CartesianSet):
+            intervals = domain.intervals
+        else:
+            assert isinstance(domain, (list, tuple)) and \
+                all(len(I) == 2 for I in domain), \
+                'Domain is Interval, Rectangle, Box or list of (a, b) pairs'
+            intervals = domain
+        self.intervals = tuple((float(a), float(b)) for a, b in intervals)
+        tdim = len(self.intervals)
+        assert 0 < tdim < 4, 'Only 1d, 2d, 3d'
+
+        degrees = [8]*tdim
+        while True:
+            coefficients = self._interpolate(field, degrees)
+            rank = coefficients.ndim - tdim
+            scale = npabs(coefficients).max() or 1.
+            # Magnitude of the last two coefficients along each axis
+            tails = []
+            for i, n in enumerate(degrees):
+                index = [slice(None)]*coefficients.ndim
+                index[rank + i] = slice(n - 1, n + 1)
+                tails.append(npabs(coefficients[tuple(index)]).max())
+            unresolved = [i for i, tail in enumerate(tails)
+                          if tail > tol*scale and degrees[i] < max_degree]
+            if not unresolved:
+                break
+            for i in unresolved:
+                degrees[i] = min(2*degrees[i], max_degree)
+
+        self.coefficients = coefficients
+        self.error = float(sum(tails))
+
+    @classmethod
+    def from_coefficients(cls, coefficients, intervals, error):
+        '''Surrogate with given coefficients.'''
+        surrogate = cls.__new__(cls)
+        surrogate.coefficients = asarray(coefficients, dtype=float)
+        surrogate.intervals = tuple(intervals)
+        surrogate.error = error
+        return surrogate
+
+    def _interpolate(self, field, degrees):
+        '''Coefficients of interpolant at Chebyshev-Lobatto grid of degrees.'''
+        nodes = [cos(pi*arange(n + 1)/n) for n in degrees]
+        x = [0.5*(a + b) + 0.5*(b - a)*node
+             for (a, b), node in zip(self.intervals, nodes)]
+        values = _evaluate(field, meshgrid(*x, indexing='ij', sparse=True))
+        shape = tuple(n + 1 for n in degrees)
+        values = broadcast_to(values, values.shape[:values.ndim - len(shape)] +
+                              shape)
+        rank = values.ndim - len(shape)
+        for i, n in enumerate(degrees):
+            values = _apply(_lobatto_transform(n), values, rank + i)
+        return values
+
+    @property
+    def tdim(self):
+        '''Number of coordinates.'''
+        return len(self.intervals)
+
+    @property
+    def rank(self):
+        '''0 for scalar, 1 for vector, 2 for tensor.'''
+        return self.coefficients.ndim - self.tdim
+
+    @property
+    def degrees(self):
+        '''Degree of the approximation along each axis.'''
+        return tuple(n - 1 for n in self.coefficients.shape[self.rank:])
+
+    def _reference(self, X):
+        '''Coordinates mapped to the reference cube [-1, 1]^tdim.'''
+        return [(2*asarray(x, dtype=float) - (a + b))/(b - a)
+                for x, (a, b) in zip(X, self.intervals)]
+
+    def __call__(self, *X):
+        '''Values at points given by arrays, field axes first.'''
+        X = broadcast_arrays(*self._reference(X))
+        # NumPy wants the coefficient axes first
+        c = moveaxis(self.coefficients, range(self.rank),
+                     range(self.tdim, self.coefficients.ndim))
+        return __chebval__[self.tdim](*(X + [c]))
+
+    def integrate(self, weight=None, degree=None):
+        '''
+        Integral over the domain, number or array of field shape. Without
+        weight it is exact for the surrogate. With weight (scalar field or
+        NumPy function) the surrogate and the weight are evaluated at points
+        of Gauss rule with degree+1 points per axis (by default the degrees
+        of the surrogate) which is exact for weights of the same degree.
+        '''
+        if weight is None:
+            values = self.coefficients
+            for n, (a, b) in reversed(zip(self.degrees, self.intervals)):
+                # Integrals of T_k over [-1, 1]
+                k = arange(n + 1)
+                w = zeros(n + 1)
+                w[::2] = 2./(1 - k[::2]**2)
+                values = values.dot(w*0.5*(b - a))
+            return values
+
+        degrees = self.degrees if degree is None else [degree]*self.tdim
+        rules = [leggauss(n + 1) for n in degrees]
+        x = [0.5*(a + b) + 0.5*(b - a)*xq
+             for (a, b), (xq, wq) in zip(self.intervals, rules)]
+        points = meshgrid(*x, indexing='ij', sparse=True)
+        values = self(*points)*_evaluate(weight, points)
+        for (a, b), (xq, wq) in reversed(zip(self.intervals, rules)):
+            values = values.dot(wq*0.5*(b - a))
+        return values
+
+    def diff(self, i):
+        '''
+        Surrogate of the partial derivative w.r.t coordinate i (0, 1, 2).
+        Its error estimate is scaled by the Markov bound n^2*2/(b - a).
+        '''
+        a, b = self.intervals[i]
+        n = self.degrees[i]
+        coefficients = chebder(self.coefficients, axis=self.rank + i)*2./(b - a)
+        return ChebyshevSurrogate.from_coefficients(coefficients,
+                                                    self.intervals,
+                                                    self.error*n**2*2./(b - a))
+
+# -----------------------------------------------------------------------------
+
+
+if __name__ == '__main__':
+    from sympy import symbols, sin, exp
+
+    x, y = symbols('x, y')
+    f = exp(sin(10*x))*exp(y)
+    g = ChebyshevSurrogate(f, [[0, 1], [0, 1]])
+    print g.degrees, g.error, g.integrate()
+    # Against varying weights
+    print [g.integrate(x**k) for k in range(3)]
@@ -1,7 +1,8 @@
 from sympy import Expr, Number, NumberSymbol
-from vector_calculus.containers import Vector, Tensor
+from vector_calculus.containers import Vector, Tensor, Polynomial
 from vector_calculus.operators import dot, inner
 from measure import Measure
+from numpy import einsum
 
 
 class CurveMeasure(Measure):
@@ -18,7 +19,10 @@ class CurveMeasure(Measure):
     def __rmul__(self, integrand):
         '''Integrate over domain.'''
         # Scalar integral is f(x(s), y(s))*|d(x, y)/ds| ds. Result is number
-        if isinstance(integrand, (Expr, Number, NumberSymbol, int, float)):
+        if isinstance(integrand, (Expr, Number, NumberSymbol, int, float,
+                                  Polynomial)):
+            if isinstance(integrand, Polynomial):
+                integrand = integrand.as_expr()
             # Note that Jacobian for this domain is defines as size of the
             # tangent vector
             integrand = integrand*self.domain.J
@@ -31,11 +35,23 @@ class CurveMeasure(Measure):
         # Tensor ingral is dot(f(x(s), y(s)), d(x, y)/ds) ds. Result is vector
         elif isinstance(integrand, Tensor):
             assert len(integrand) == self.domain.gdim, 'Gdim mismatch'
-            integrand = dot(integrand, self.domain.tau)
-            return Vector([vi*self for vi in integrand])
+            # Weight of components is in tau
+            return self._integrate_field(dot(integrand, self.domain.tau), 1)
         else:
             raise TypeError('No surface integral of type %s' % type(integrand))
 
+    def _weight(self, values, J, n, tau):
+        '''Integrand values at quadrature points weighted as in __rmul__.'''
+        # Scalar, f*J
+        if values.ndim == 1:
+            return values*J
+        # Vector, inner(f, tau)
+        elif values.ndim == 2:
+            return einsum('iq,qi->q', values, tau)
+        # Tensor, dot(f, tau)
+        else:
+            return einsum('ijq,qj->iq', values, tau)
+
 
 class dL(CurveMeasure):
     '''
@@ -134,7 +150,6 @@ if __name__ == '__main__':
     dC = CurveMeasure(ParametrizedSet(ParameterDomain((th, (0, 2*pi))),
         (sin(th), cos(th))))
 
-    # FIXME this shows nicely for ellipse the need for speed ie numeric quad
-    # where possible!
-
-    print '>> Ellipse ', 1*dC
+    # Symbolic integration of the length of tangent is hopeless here, numeric
+    # quadrature is not
+    print '>> Ellipse ', dC.quadrature(1, degree=20)
@@ -0,0 +1,294 @@
+from numpy import asarray, ascontiguousarray, arange, full, zeros, moveaxis
+from numpy import savez, prod, int64, uint8, uint64, float64
+
+# VTK cell types of simplices by number of vertices
+__simplex_types__ = {1: 1, 2: 3, 3: 5, 4: 10}
+# VTK cell types of grid cells by dimension: line, quad, hexahedron
+__grid_types__ = {1: 3, 2: 9, 3: 12}
+
+# Rows written at once when a buffer cannot be written as it is
+__chunk__ = 2**16
+
+
+def _write_array(f, a):
+    '''Write array to file from its buffer, non-contiguous ones in chunks.'''
+    if a.flags.c_contiguous:
+        a.tofile(f)
+    else:
+        for start in range(0, len(a), __chunk__):
+            ascontiguousarray(a[start:start+__chunk__]).tofile(f)
+
+
+def _point_major(a, n):
+    '''Data with rows of n points (cells).'''
+    a = asarray(a)
+    assert a.ndim > 0 and a.shape[0] == n, \
+        'Data needs a row per point (cell), got shape %s' % (a.shape, )
+    return a
+
+
+def grid_cells(shape):
+    '''
+    Cells (lines, quads or hexahedra) of structured grid of points with
+    shape, e.g. from ParametrizedSet.sample_grid, and their VTK cell type.
+    Points are numbered in C order.
+    '''
+    shape = tuple(shape)
+    dim = len(shape)
+    index = arange(prod(shape)).reshape(shape)
+    # Lower corners of the cells
+    corners = index[tuple(slice(0, n-1) for n in shape)].flatten()
+    strides = [int(prod(shape[i+1:])) for i in range(dim)]
+    # VTK orders vertices of quads and hexahedra counter-clockwise
+    ring = [(0, 0), (1, 0), (1, 1), (0, 1)]
+    if dim == 1:
+        offsets = [(0, ), (1, )]
+    elif dim == 2:
+        offsets = ring
+    else:
+        offsets = [o + (k, ) for k in (0, 1) for o in ring]
+    shifts = [sum(o*s for o, s in zip(offset, strides)) for offset in offsets]
+    return corners[:, None] + asarray(shifts), __grid_types__[dim]
+
+
+class VTUWriter(object):
+    '''
+    Streaming writer of VTK XML unstructured grid with raw appended binary
+    data. Sizes are given up front so the layout of the file is known and
+    points, cells and data can be appended in chunks of rows, in any order,
+    without holding the whole output in memory. Chunks are written from their
+    NumPy buffers. Points with gdim < 3 are padded with zeros chunk by chunk.
+    '''
+
+    def __init__(self, path, npoints, cells=None, point_data=None,
+                 cell_data=None, cell_type=None):
+        '''
+        Open file for npoints points. Cells is (ncells, nvertices), None for
+        vertex cells of the points. Point and cell data map names to the
+        shape of values at a point (cell), e.g. () scalar, (3, ) vector.
+        Cell type is inferred for simplices.
+        '''
+        if cells is None:
+            ncells, nvertices = npoints, 1
+        else:
+            ncells, nvertices = cells
+        if cell_type is None:
+            cell_type = __simplex_types__[nvertices]
+        point_data = dict(point_data or {})
+        cell_data = dict(cell_data or {})
+
+        self.npoints, self.ncells = npoints, ncells
+        self.nvertices, self.cell_type = nvertices, cell_type
+        # Arrays in the order of the appended data:
+        # name -> (vtk type, components, rows, itemsize)
+        arrays = [('points', ('Float64', 3, npoints, 8)),
+                  ('connectivity', ('Int64', nvertices, ncells, 8)),
+                  ('offsets', ('Int64', 1, ncells, 8)),
+                  ('types', ('UInt8', 1, ncells, 1))]
+        arrays += [(('point', name), ('Float64', int(prod(shape)), npoints, 8))
+                   for name, shape in sorted(point_data.items())]
+        arrays += [(('cell', name), ('Float64', int(prod(shape)), ncells, 8))
+                   for name, shape in sorted(cell_data.items())]
+
+        # Blocks are UInt64 byte count followed by the data
+        self._regions = {}
+        offset = 0
+        for key, (vtype, ncomp, rows, itemsize) in arrays:
+            nbytes = ncomp*rows*itemsize
+            self._regions[key] = [offset, ncomp, rows, 0]
+            offset += 8 + nbytes
+
+        def data_array(key, name):
+            vtype, ncomp = dict(arrays)[key][:2]
+            return ('<DataArray type="%s" Name="%s" NumberOfComponents="%d" '
+                    'format="appended" offset="%d"/>' %
+                    (vtype, name, ncomp, self._regions[key][0]))
+
+        header = ['<?xml version="1.0"?>',
+                  '<VTKFile type="UnstructuredGrid" version="1.0" '
+                  'byte_order="LittleEndian" header_type="UInt64">',
+                  '<UnstructuredGrid>',
+                  '<Piece NumberOfPoints="%d" NumberOfCells="%d">' %
+                  (npoints, ncells),
+                  '<PointData>'] + \
+            [data_array(('point', name), name) for name in sorted(point_data)] + \
+            ['</PointData>', '<CellData>'] + \
+            [data_array(('cell', name), name) for name in sorted(cell_data)] + \
+            ['</CellData>',
+             '<Points>', data_array('points', 'Points'), '</Points>',
+             '<Cells>', data_array('connectivity', 'connectivity'),
+             data_array('offsets', 'offsets'), data_array('types', 'types'),
+             '</Cells>', '</Piece>', '</UnstructuredGrid>',
+             '<AppendedData encoding="raw">']
+
+        self._file = open(path, 'wb')
+        self._file.write('\n'.join(header) + '\n_')
+        self._start = self._file.tell()
+        # Byte counts of blocks; data is filled in by appends
+        for key, (vtype, ncomp, rows, itemsize) in arrays:
+            self._file.seek(self._start + self._regions[key][0])
+            asarray([ncomp*rows*itemsize], dtype=uint64).tofile(self._file)
+        self._file.seek(self._start + offset)
+        self._file.write('\n</AppendedData>\n</VTKFile>\n')
+        self._itemsizes = dict((key, value[3]) for key, value in arrays)
+
+    def _append(self, key, chunk, dtype):
+        '''Write rows of chunk after the rows already written for key.'''
+        offset, ncomp, rows, written = self._regions[key]
+        chunk = asarray(chunk, dtype=dtype)
+        chunk = chunk.reshape((len(chunk), ncomp))
+        assert written + len(chunk) <= rows, 'Too many rows for %s' % (key, )
+        itemsize = self._itemsizes[key]
+        self._file.seek(self._start + offset + 8 + written*ncomp*itemsize)
+        _write_array(self._file, chunk)
+        self._regions[key][3] += len(chunk)
+
+    def write_points(self, chunk):
+        '''Append points (rows x gdim).'''
+        chunk = asarray(chunk, dtype=float64)
+        if chunk.ndim == 1:
+            chunk = chunk[:, None]
+        if chunk.shape[1] < 3:
+            padded = zeros((len(chunk), 3))
+            padded[:, :chunk.shape[1]] = chunk
+            chunk = padded
+        self._append('points', chunk, float64)
+
+    def write_cells(self, chunk):
+        '''Append cells (rows x nvertices) as indices of points.'''
+        self._append('connectivity', chunk, int64)
+
+    def write_point_data(self, name, chunk):
+        '''Append values of point data name at rows of points.'''
+        self._append(('point', name), chunk, float64)
+
+    def write_cell_data(self, name, chunk):
+        '''Append values of cell data name at rows of cells.'''
+        self._append(('cell', name), chunk, float64)
+
+    def close(self):
+        '''Write offsets and types of cells (vertex cells if none given).'''
+        if self._file.closed:
+            return
+        ncells, nvertices = self.ncells, self.nvertices
+        for start in range(0, ncells, __chunk__):
+            stop = min(start + __chunk__, ncells)
+            if nvertices == 1 and \
+                    self._regions['connectivity'][3] < self.ncells:
+                self.write_cells(arange(start, stop))
+            self._append('offsets', arange(start + 1, stop + 1)*nvertices,
+                         int64)
+            self._append('types', full(stop - start, self.cell_type), uint8)
+        missing = [key for key, (offset, ncomp, rows, written)
+                   in self._regions.items() if written != rows]
+        self._file.close()
+        assert not missing, 'Not all rows written for %s' % missing
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, error, value, traceback):
+        # Incomplete file of failed export is just closed
+        if error is None:
+            self.close()
+        else:
+            self._file.close()
+
+
+def write_vtu(path, points, cells=None, point_data=None, cell_data=None,
+              cell_type=None):
+    '''
+    Write points (npoints x gdim), cells (ncells x nvertices) and point and
+    cell data {name: array} to VTK XML file with raw appended data. Data
+    arrays have a row per point (cell), i.e. field-first arrays from
+    lambdify_field must have their last axis moved to the front.
+    '''
+    points = asarray(points)
+    if points.ndim == 1:
+        points = points[:, None]
+    npoints = len(points)
+    point_data = dict((name, _point_major(a, npoints))
+                      for name, a in (point_data or {}).items())
+    if cells is not None:
+        cells = asarray(cells)
+        ncells = len(cells)
+    else:
+        ncells = npoints
+    cell_data = dict((name, _point_major(a, ncells))
+                     for name, a in (cell_data or {}).items())
+
+    with VTUWriter(path, npoints, None if cells is None else cells.shape,
+                   dict((name, a.shape[1:]) for name, a in point_data.items()),
+                   dict((name, a.shape[1:]) for name, a in cell_data.items()),
+                   cell_type) as writer:
+        writer.write_points(points)
+        if cells is not None:
+            writer.write_cells(cells)
+        for name, a in point_data.items():
+            writer.write_point_data(name, a)
+        for name, a in cell_data.items():
+            writer.write_cell_data(name, a)
+
+
+def write_npz(path, points, cells=None, point_data=None, cell_data=None):
+    '''
+    Write points, cells and data to uncompressed .npz; arrays are stored
+    from their buffers under 'points', 'cells', 'point_data/name' and
+    'cell_data/name'. Data arrays have a row per point (cell) as in
+    write_vtu.
+    '''
+    arrays = {'points': asarray(points)}
+    npoints = ncells = len(arrays['points'])
+    if cells is not None:
+        arrays['cells'] = asarray(cells)
+        ncells = len(arrays['cells'])
+    for prefix, data, n in (('point_data', point_data, npoints),
+                            ('cell_data', cell_data, ncells)):
+        for name, a in (data or {}).items():
+            arrays['%s/%s' % (prefix, name)] = _point_major(a, n)
+    savez(path, **arrays)
+
+
+def export_set(path, pset, n, fields=None):
+    '''
+    Write geometry of ParametrizedSet on grid of n points per parameter
+    (sample_grid) with J, n, tau and fields {name: field} evaluated at the
+    points. Format is chosen by the extension, .vtu or .npz.
+    '''
+    from vector_calculus.operators import compile_field, xyz
+
+    params, x, J, normal, tau = pset.sample_grid(n)
+    shape = J.shape
+    x = x.reshape((-1, pset.gdim))
+    cells, cell_type = grid_cells(shape)
+    point_data = {'J': J.reshape(-1)}
+    for name, g in (('n', normal), ('tau', tau)):
+        if g is not None:
+            point_data[name] = g.reshape((-1, pset.gdim))
+    for name, field in (fields or {}).items():
+        # Values are field-first, point axis last
+        values = compile_field(field, xyz[:pset.gdim])(*x.T)
+        point_data[name] = moveaxis(values, -1, 0)
+
+    if path.endswith('.npz'):
+        write_npz(path, x, cells, point_data)
+    else:
+        write_vtu(path, x, cells, point_data, cell_type=cell_type)
+
+# -----------------------------------------------------------------------------
+
+
+if __name__ == '__main__':
+    from parametrized_set import ParametrizedSet
+    from parameter_domain import ParameterDomain
+    from sympy import symbols, sin, cos
+    from tempfile import mkdtemp
+    import os
+
+    th, phi = symbols('th, phi')
+    x, y, z = symbols('x, y, z')
+    sphere = ParametrizedSet(ParameterDomain((th, (0.1, 3)), (phi, (0, 6.28))),
+                             (sin(th)*cos(phi), sin(th)*sin(phi), cos(th)))
+    path = os.path.join(mkdtemp(), 'sphere.vtu')
+    export_set(path, sphere, 32, {'f': x*y*z})
+    print open(path).read(400)
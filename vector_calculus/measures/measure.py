@@ -1,23 +1,68 @@
 from parametrized_set import ParametrizedSet
-from sympy import integrate, Expr, Number, NumberSymbol, S
+from quadrature import reference_rule
+from adaptive import adaptive_quadrature
+from asynchronous import aintegrate
+from vector_calculus.containers import Vector, Tensor, Polynomial
+from vector_calculus.containers.serialization import to_bytes, from_bytes
+from vector_calculus.operators import compile_field, lambdify_field, xyz
+from numpy import asarray, newaxis, tile
+from sympy import integrate, Expr, Number, NumberSymbol, S, Add
+from collections import OrderedDict
+from threading import Lock
 
 #FIXME 0-measure
 #FIXME Dirac measure
 #FIXME allow numeric for special set.
 # computing quad points for triangles
 
+# Integrals of terms by (domain, term). Least recently used are dropped when
+# there are more than __max_terms__. Measures integrate from several threads
+# of AsyncIntegrator so the cache is only touched under the lock
+__terms__ = OrderedDict()
+__max_terms__ = 4096
+__terms_lock__ = Lock()
+
+
+def clear_term_cache():
+    '''Forget integrals of terms memoized by measures.'''
+    with __terms_lock__:
+        __terms__.clear()
+
+
 class Measure(object):
-    '''Integral over domain describing points in Cartesian coordinate system.'''
+    '''
+    Integral over domain describing points in Cartesian coordinate system.
+    With memoize set the integrand is split to terms whose integrals are
+    cached, see _integrate_terms.
+    '''
+
+    memoize = False
 
     def __init__(self, domain):
         self.domain = domain
 
+    def aintegrate(self, integrand, timeout=None, integrator=None):
+        '''
+        Start computing integrand*self in the background without blocking
+        the caller. Returns IntegralFuture, see AsyncIntegrator.
+        '''
+        return aintegrate(integrand, self, timeout, integrator)
+
+    def to_bytes(self):
+        '''Compact serialization, the domain pickles by its compact form.'''
+        return to_bytes(self)
+
+    @classmethod
+    def from_bytes(cls, data):
+        '''Measure from bytes of to_bytes.'''
+        return from_bytes(data, cls)
+
     def __call__(self, integrand):
         '''
         Integrate scalar integrand with the measure. This is a working horse for 
         specialized classes. There is no Jacobian!
         '''
-        if isinstance(integrand, (int, float)):
+        if isinstance(integrand, (int, float, Polynomial)):
             integrand = S(integrand)
         
         assert isinstance(integrand, (Expr, Number, NumberSymbol))
@@ -25,13 +70,151 @@ class Measure(object):
         # Substitute
         f = self.domain.substitute(integrand)
 
-        # Integrate over parameter domain
+        return self._integrate(f)
+
+    def _integrate(self, f):
+        '''Integrate f over parameter domain in the order planned for f.'''
+        if self.memoize:
+            return self._integrate_terms(f)
+        return self._integrate_term(f)
+
+    def _integrate_terms(self, f):
+        '''
+        Integrate f term by term. The expanded f is a sum of terms whose
+        factors not depending on the parameters are pulled out. Integrals of
+        the remaining terms are cached per domain so that a term recurring in
+        many integrands is integrated once.
+        '''
+        # Domains are identified by their compact serialization
+        key = to_bytes(self.domain)
+        params = self.domain.pdomain.parameters
+        integrals = {}
+        for term in Add.make_args(S(f).expand()):
+            coefficient, term = term.as_independent(*params, as_Add=False)
+            integrals[term] = integrals.get(term, 0) + coefficient
+
+        terms = []
+        for term, coefficient in integrals.iteritems():
+            term_key = (key, term)
+            with __terms_lock__:
+                # Reinserted as the most recently used
+                value = __terms__.pop(term_key, None)
+                if value is not None:
+                    __terms__[term_key] = value
+            if value is None:
+                # Integrated outside the lock; a race only integrates twice
+                value = self._integrate_term(term)
+                with __terms_lock__:
+                    __terms__.pop(term_key, None)
+                    while len(__terms__) >= __max_terms__:
+                        __terms__.popitem(last=False)
+                    __terms__[term_key] = value
+            terms.append(coefficient*value)
+        return Add(*terms)
+
+    def _integrate_term(self, f):
+        '''Integrate f as a whole in the order planned for f.'''
         ans = f
-        for var, bounds in self.domain.items():
+        for var, bounds in self.domain.pdomain.plan(f):
             ans = integrate(ans, (var, bounds[0], bounds[1]))
 
         return ans
 
+    def _integrate_field(self, integrand, weight):
+        '''
+        Integrate every component of Vector or Tensor integrand multiplied
+        by weight (function of parameters). Components are substituted with
+        the mapping built once for the set and components which are equal
+        after substitution are integrated once. Result has type of integrand.
+        '''
+        integrals = {}
+
+        def component(f):
+            f = self.domain.substitute(S(f))*weight
+            if f not in integrals:
+                integrals[f] = self._integrate(f)
+            return integrals[f]
+
+        if isinstance(integrand, Vector):
+            return Vector([component(f) for f in integrand])
+        else:
+            assert isinstance(integrand, Tensor)
+            # Structured tensors integrate only independent components
+            return integrand.applyfunc(component)
+
+    def quadrature(self, integrand, degree=4, executor=None):
+        '''
+        Integrate numerically with a rule that is exact for polynomials of
+        degree in the parameters. Unlike __call__ the Jacobian is included.
+        Jacobian, normals and tangents are evaluated at the quadrature points.
+        With Executor the points are split to chunks integrated in parallel.
+        '''
+        points, weights = reference_rule(self.domain, degree)
+        if executor is None:
+            return self._quadrature(integrand, points, weights)
+
+        return executor.reduce(_quadrature_chunk,
+                               [(self, integrand, points[chunk], weights[chunk])
+                                for chunk in executor.chunks(len(weights))])
+
+    def adaptive(self, integrand, tol=1E-8, degree=4, max_cells=10000):
+        '''
+        Integrate numerically refining the parameter domain where the error
+        indicator is large, e.g. near singularities of the integrand. Returns
+        the estimate and the error indicator.
+        '''
+        return adaptive_quadrature(self, integrand, tol, degree, max_cells)
+
+    def sweep(self, integrand, params, values, degree=4, symbolic=False):
+        '''
+        Integrate integrand with free parameters params for many values of
+        the parameters, values is array (nvalues x nparams) or (nvalues, )
+        for a single parameter. Numerically, the integrand is compiled once
+        with the parameters as extra arguments and evaluated on the grid of
+        values and quadrature points in one pass. With symbolic the
+        parameterized integral is computed once and evaluated at values.
+        Returns array (nvalues, ) + shape of the integral.
+        '''
+        params = tuple(params)
+        values = asarray(values, dtype=float).reshape((-1, len(params)))
+        nvalues = len(values)
+        # Parameter axis of field values first
+        first = lambda v: v.reshape((-1, nvalues)).T.reshape((nvalues, ) +
+                                                            v.shape[:-1])
+        if symbolic:
+            integral = integrand*self
+            return first(lambdify_field(integral, params)(*values.T))
+
+        domain = self.domain
+        points, weights = reference_rule(domain, degree)
+        npoints = len(weights)
+        # Geometry is shared by all values
+        x, J, n, tau = domain.evaluate(points)
+        # Grid (nvalues x npoints) of points and parameters
+        f = compile_field(integrand, xyz[:domain.gdim] + params)
+        fvalues = f(*([xi[newaxis, :] for xi in x.T] +
+                      [pi[:, newaxis] for pi in values.T]))
+        J, n, tau = [g if g is None else tile(g, (nvalues, ) + (1, )*(g.ndim-1))
+                     for g in (J, n, tau)]
+        shape = fvalues.shape[:-2]
+        weighted = self._weight(fvalues.reshape(shape + (-1, )), J, n, tau)
+        weighted = weighted.reshape(weighted.shape[:-1] + (nvalues, npoints))
+        return first(weighted.dot(weights))
+
+    def _quadrature(self, integrand, points, weights):
+        '''Quadrature with points and weights of the parameter domain.'''
+        domain = self.domain
+        x, J, n, tau = domain.evaluate(points)
+        values = compile_field(integrand, xyz[:domain.gdim])(*x.T)
+        return self._weight(values, J, n, tau).dot(weights)
+
+    def _weight(self, values, J, n, tau):
+        '''
+        Values of integrand times Jacobian at quadrature points. All the
+        components of Vector or Tensor are weighted at once.
+        '''
+        return values*J
+
     def __add__(self, other):
         '''Product of two measures is a new ProductMeasure.'''
         assert isinstance(other, (Measure, ProductMeasure))
@@ -67,12 +250,40 @@ class ProductMeasure(Measure):
 
     def __rmul__(self, integrand):
         '''Integrate with individual measures.'''
-        measures = self.measures
-        ans = integrand*measures[0]
-        # FIXME if we add += to vectors/tensors this can be simplified
-        for measure in measures[1:]:
-            ans = ans + integrand*measure
-        return ans
+        terms = [integrand*measure for measure in self.measures]
+        # Sum all at once, pairwise + would rebuild the growing sum
+        if isinstance(terms[0], (Vector, Tensor)):
+            return type(terms[0]).sum(terms)
+        else:
+            return Add(*terms)
+
+    def quadrature(self, integrand, degree=4, executor=None):
+        '''
+        Integrate numerically with individual measures. With Executor the
+        measures are integrated in parallel.
+        '''
+        if executor is None:
+            return sum(measure.quadrature(integrand, degree)
+                       for measure in self.measures)
+
+        return executor.reduce(_measure_quadrature,
+                               [(measure, integrand, degree)
+                                for measure in self.measures])
+
+    def adaptive(self, integrand, tol=1E-8, degree=4, max_cells=10000):
+        '''
+        Integrate adaptively with individual measures which share tol and
+        max_cells equally.
+        '''
+        n = len(self.measures)
+        results = [measure.adaptive(integrand, tol/n, degree, max_cells/n)
+                   for measure in self.measures]
+        return sum(r[0] for r in results), sum(r[1] for r in results)
+
+    def sweep(self, integrand, params, values, degree=4, symbolic=False):
+        '''Sweep with individual measures.'''
+        return sum(measure.sweep(integrand, params, values, degree, symbolic)
+                   for measure in self.measures)
 
     def __add__(self, other):
         '''Combine measures.'''
@@ -83,6 +294,19 @@ class ProductMeasure(Measure):
         else:
             return ProductMeasure(self.measures + [other])
 
+
+def _quadrature_chunk(args):
+    '''Job of parallel quadrature over chunk of points.'''
+    measure, integrand, points, weights = args
+    return measure._quadrature(integrand, points, weights)
+
+
+def _measure_quadrature(args):
+    '''Job of parallel quadrature over measure.'''
+    measure, integrand, degree = args
+    return measure.quadrature(integrand, degree)
+
+
 # -----------------------------------------------------------------------------
         
 
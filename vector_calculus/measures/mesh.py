@@ -0,0 +1,94 @@
+from quadrature import simplex_rule
+from vector_calculus.operators import compile_field, xyz
+from itertools import imap
+from numpy import load, asarray, empty, einsum, sqrt, fabs
+from numpy.linalg import det
+from numpy.lib.format import open_memmap
+
+
+def load_mesh(vertices, cells):
+    '''Memory-map vertex and cell arrays stored in .npy files.'''
+    return load(vertices, mmap_mode='r'), load(cells, mmap_mode='r')
+
+
+def _cell_chunk(args):
+    '''Integrals of integrand over cells whose vertices are X.'''
+    integrand, X, degree = args
+    # X is ncells x (tdim+1) x gdim
+    tdim, gdim = X.shape[1] - 1, X.shape[2]
+    f = compile_field(integrand, xyz[:gdim])
+    points, weights = simplex_rule(tdim, degree)
+
+    # The map of SimplexSet is X0*(1-s-t-r) + X1*s + X2*t + X3*r, i.e.
+    # affine with matrix A and offset X0
+    A = X[:, 1:] - X[:, :1]
+    x = X[:, 0, None, :] + einsum('qk,ckg->cqg', points, A)
+    # Jacobian is |det(A)| for volumes and sqrt(det(A*A^T)) otherwise
+    if tdim == gdim:
+        J = fabs(det(A))
+    else:
+        J = sqrt(det(einsum('ckg,clg->ckl', A, A)))
+
+    values = f(*[x[..., i] for i in range(gdim)])
+    return values.dot(weights)*J
+
+
+def iter_cell_integrals(integrand, vertices, cells, degree=2, chunk_size=4096,
+                        executor=None):
+    '''
+    Integrate scalar integrand over every simplex cell of the mesh. Cells are
+    streamed in chunks of chunk_size so only the vertices of the current chunk
+    are ever in memory. Yields arrays of per-cell integrals chunk by chunk.
+    With Executor the chunks are integrated in parallel.
+    '''
+    ncells, nvertices = cells.shape
+    gdim = vertices.shape[1]
+    tdim = nvertices - 1
+    assert 0 < tdim <= gdim < 4, \
+        'Invalid cells with tdim(%d) and gdim(%d)' % (tdim, gdim)
+
+    # Fancy indexing a memmap reads only the rows we need
+    chunks = ((integrand, vertices[asarray(cells[start:start+chunk_size])],
+               degree)
+              for start in range(0, ncells, chunk_size))
+
+    if executor is None:
+        return imap(_cell_chunk, chunks)
+    else:
+        return executor.imap(_cell_chunk, chunks)
+
+
+def cell_integrals(integrand, vertices, cells, out=None, degree=2,
+                   chunk_size=4096, executor=None):
+    '''
+    Integrate scalar integrand over every simplex cell of the mesh and store
+    the values in out. The output can be an array, a path of .npy memmap that
+    is created, or None for a new in-memory array.
+    '''
+    ncells = len(cells)
+    if out is None:
+        out = empty(ncells)
+    elif isinstance(out, basestring):
+        out = open_memmap(out, mode='w+', dtype=float, shape=(ncells, ))
+    assert len(out) == ncells, 'Output size does not match number of cells'
+
+    start = 0
+    for values in iter_cell_integrals(integrand, vertices, cells, degree,
+                                      chunk_size, executor):
+        out[start:start+len(values)] = values
+        start += len(values)
+    return out
+
+# -----------------------------------------------------------------------------
+
+
+if __name__ == '__main__':
+    from numpy import array
+
+    # Unit square split into two triangles
+    vertices = array([[0, 0], [1, 0], [1, 1], [0, 1]], dtype=float)
+    cells = array([[0, 1, 2], [0, 2, 3]])
+
+    x, y, z = xyz
+    values = cell_integrals(x*y, vertices, cells)
+    print values, values.sum(), 0.25
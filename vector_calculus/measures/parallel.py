@@ -0,0 +1,68 @@
+from multiprocessing import Pool, cpu_count
+from multiprocessing.pool import ThreadPool
+from collections import deque
+
+
+class Executor(object):
+    '''
+    Pool of workers for numeric quadrature over chunks of cells or points.
+    Threads are the default since NumPy releases the GIL in its kernels,
+    processes are optional. Results are returned in the order of chunks and
+    chunk boundaries depend only on chunk_size so that sums reduced in that
+    order are the same bit-for-bit for any number of workers.
+    '''
+
+    def __init__(self, workers=None, chunk_size=4096, processes=False):
+        assert chunk_size > 0, 'Invalid chunk size %d' % chunk_size
+        self.workers = workers if workers is not None else cpu_count()
+        assert self.workers > 0, 'Need at least one worker'
+        self.chunk_size = chunk_size
+        self.pool = (Pool if processes else ThreadPool)(self.workers)
+
+    def chunks(self, n):
+        '''Slices of range(n) by chunk_size.'''
+        return [slice(start, min(start+self.chunk_size, n))
+                for start in range(0, n, self.chunk_size)]
+
+    def imap(self, func, args):
+        '''
+        Iterate over func(arg) for args in order. At most two jobs per worker
+        are in flight so that args can be a generator of large chunks.
+        '''
+        pending = deque()
+        for arg in args:
+            pending.append(self.pool.apply_async(func, (arg, )))
+            if len(pending) >= 2*self.workers:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+    def reduce(self, func, args):
+        '''Sum of func(arg) over args added in the order of args.'''
+        total = None
+        for value in self.imap(func, args):
+            total = value if total is None else total + value
+        return total
+
+    def close(self):
+        '''Shut down the workers.'''
+        self.pool.close()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+# -----------------------------------------------------------------------------
+
+
+if __name__ == '__main__':
+    from numpy import arange
+
+    x = arange(10**6)/10.**6
+    for workers in (1, 4):
+        with Executor(workers, chunk_size=1000) as executor:
+            print executor.reduce(lambda s: (x[s]**2).sum(),
+                                  executor.chunks(len(x))).hex()
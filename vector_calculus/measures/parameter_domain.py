@@ -1,5 +1,10 @@
 from collections import OrderedDict
-from sympy import Symbol, Number, NumberSymbol
+from itertools import permutations
+from sympy import Symbol, Number, NumberSymbol, lambdify
+from numpy import asarray, empty_like, ones
+from vector_calculus.containers.serialization import pack_expressions
+from vector_calculus.containers.serialization import unpack_expressions
+from vector_calculus.containers.serialization import to_bytes, from_bytes
 
 
 class ParameterDomain(object):
@@ -44,6 +49,27 @@ class ParameterDomain(object):
             # Unknowns
             self._parameters = set(self._domain.keys())
 
+        # Bounds compiled to NumPy on demand
+        self._compiled_bounds = None
+
+    def __reduce__(self):
+        '''
+        Pickle by parameters and bounds as canonical strings. Compiled bounds
+        are rebuilt on demand.
+        '''
+        return (_unpickle_domain,
+                (pack_expressions([[var] + list(self._domain[var])
+                                   for var in self.variables]), ))
+
+    def to_bytes(self):
+        '''Compact serialization.'''
+        return to_bytes(self)
+
+    @classmethod
+    def from_bytes(cls, data):
+        '''ParameterDomain from bytes of to_bytes.'''
+        return from_bytes(data, cls)
+
     def __getitem__(self, var):
         '''Bounds for the var parameter.'''
         return self._domain[var]
@@ -60,11 +86,81 @@ class ParameterDomain(object):
         '''Reversed items iterator.'''
         return reversed(self._domain.items())
 
+    def orders(self):
+        '''
+        All admissible orders of integration. A parameter must be integrated
+        before the parameters its bounds depend on.
+        '''
+        variables = list(reversed(self.variables))
+        return [order for order in permutations(variables)
+                if all(order.index(var) < order.index(dep)
+                       for var in order
+                       for dep in self._dependencies(var))]
+
+    def plan(self, integrand):
+        '''
+        Items (var, bounds) in the order of integration chosen for integrand.
+        Among the parameters that can be integrated next we prefer those in
+        which the integrand is a polynomial. Ties keep the reversed order of
+        definition as in items.
+        '''
+        variables = list(reversed(self.variables))
+        order = []
+        while len(order) < len(variables):
+            remaining = [var for var in variables if var not in order]
+            # Parameters that no remaining bounds depend on
+            ready = [var for var in remaining
+                     if not any(var in self._dependencies(other)
+                                for other in remaining)]
+            order.append(min(ready,
+                             key=lambda var: (not integrand.is_polynomial(var),
+                                              variables.index(var))))
+        return [(var, self._domain[var]) for var in order]
+
+    def _dependencies(self, var):
+        '''Parameters that bounds of var depend on.'''
+        return set.union(*[set(bound.atoms()) for bound in self._domain[var]])\
+            & self._parameters
+
     @property
     def parameters(self):
         '''Parameters that define the domain.'''
         return self._parameters
 
+    @property
+    def variables(self):
+        '''Parameters in the order of definition.'''
+        return tuple(self._domain.keys())
+
+    def from_unit_cube(self, u):
+        '''
+        Map points (npoints x len(domain)) of [0, 1]^d to the domain by
+        rescaling the bounds of the parameters in the order of definition.
+        Returns points of the domain and Jacobian of the map.
+        '''
+        if self._compiled_bounds is None:
+            variables = self.variables
+            self._compiled_bounds = [lambdify(variables[:i], bounds, 'numpy')
+                                     for i, bounds in
+                                     enumerate(self._domain.values())]
+
+        u = asarray(u, dtype=float)
+        assert u.ndim == 2 and u.shape[1] == len(self), 'Invalid points'
+        points = empty_like(u)
+        J = ones(len(u))
+        for i, bounds in enumerate(self._compiled_bounds):
+            lower, upper = bounds(*points[:, :i].T)
+            points[:, i] = lower + (upper - lower)*u[:, i]
+            J *= upper - lower
+        return points, J
+
+
+def _unpickle_domain(packed):
+    '''ParameterDomain from packed parameters and bounds.'''
+    items = unpack_expressions(packed)
+    return ParameterDomain(*[(var, (lower, upper))
+                             for var, lower, upper in items])
+
 # -----------------------------------------------------------------------------
 
 
@@ -1,9 +1,15 @@
 from parameter_domain import ParameterDomain
 from vector_calculus.containers import Vector, Tensor
 from vector_calculus.operators import dot, cross
-from sympy import Number, symbols, diff, Matrix, sqrt, Rational
-from numpy import array, ndarray
-from numpy.linalg import det
+from sympy import Number, symbols, diff, Matrix, sqrt, Rational, lambdify, Add
+from numpy import array, ndarray, asarray, empty, broadcast_to, fabs
+from numpy import meshgrid, linspace
+from numpy import cross as npcross
+from numpy.random import RandomState
+from numpy.linalg import det, norm
+from vector_calculus.containers.serialization import pack_expressions
+from vector_calculus.containers.serialization import unpack_expressions
+from vector_calculus.containers.serialization import to_bytes, from_bytes
 
 
 # Symbols in terms of which the mapping is defined
@@ -51,24 +57,51 @@ class ParametrizedSet(object):
         self._mapping = dict((var, comp) for var, comp in zip(xyz, mapping))
         # Remeber the domain
         self._pdomain = domain
+        # Mapping compiled to NumPy on demand
+        self._compiled_mapping = None
 
         params = domain.parameters
+        variables = domain.variables
+        # Jacobian matrix d(mapping)/d(params); columns are tangents
+        Jac = Matrix([[diff(comp, var) for var in variables] for comp in mapping])
+
+        # Affine mapping is x = A*p + b where A is the constant Jacobian. We
+        # keep it exact and in floats for mapping points
+        if not (Jac.free_symbols & params):
+            origin = dict((var, 0) for var in variables)
+            b = Matrix([comp.subs(origin) for comp in mapping])
+            self._affine = (Jac, b)
+            self._affine_array = (array(Jac.tolist(), dtype=float),
+                                  array(b.tolist(), dtype=float).flatten())
+        else:
+            self._affine = None
+            self._affine_array = None
+
+        # Geometry is derived on demand. Symbolic for J, n, tau properties and
+        # numeric, from compiled derivatives, at given points
+        self._Jac = Jac
+        self._orientation = orientation
+        self._symbolic_geometry = False
+        self._compiled_geometry = None
+
+    def _build_geometry(self):
+        '''Symbolic Jacobian, normal and tangent.'''
+        Jac, orientation = self._Jac, self._orientation
         # Every mapping has a Jacobian but not every has normal and tangent
         self._n = None
         self._tau = None
        
         # Volumes, Square matrix only Jacobian 
         if self._tdim == self._gdim:
-            Jac = Matrix([[diff(comp, var) for var in params] for comp in mapping])
             self._J = abs(Jac.det())
         # Curves and surfaces have normals or tangents in addition to Jacobian
         else:
             # Curves
             if self._tdim == 1:
                 # Tagent
-                self._tau = Vector([diff(comp, list(params)[0]) for comp in mapping])
+                self._tau = Vector(Jac.col(0))
                 # Jacobian is length of tangent
-                self._J = sqrt(sum(v**2 for v in self._tau))
+                self._J = sqrt(Add(*[v**2 for v in self._tau]))
                 
                 # And in 2d we can define a normal
                 if self._gdim == 2:
@@ -78,12 +111,120 @@ class ParametrizedSet(object):
 
             # Surface in 3d has normal
             elif self._tdim == 2 and self._gdim == 3:
-                u0 = Vector([diff(comp, list(params)[0]) for comp in mapping])
-                u1 = Vector([diff(comp, list(params)[1]) for comp in mapping])
+                u0 = Vector(Jac.col(0))
+                u1 = Vector(Jac.col(1))
 
                 self._n = cross(u0, u1)
                 self._n = self._n if orientation == '+' else -self._n
-                self._J = sqrt(sum(v**2 for v in self._n))
+                self._J = sqrt(Add(*[v**2 for v in self._n]))
+        self._symbolic_geometry = True
+
+    def geometry(self, points):
+        '''
+        Jacobian, normal and tangent at points (npoints x tdim) of parameter
+        domain. These are computed numerically from compiled first derivatives
+        of the mapping so no symbolic square roots are formed. Returns J
+        (npoints), n and tau (npoints x gdim); the latter are None if the set
+        has no normal or tangent.
+        '''
+        return self.evaluate(points)[1:]
+
+    def evaluate(self, points):
+        '''
+        Points of the set and its geometry at points (npoints x tdim) of
+        parameter domain. The mapping and its first derivatives are one
+        compiled function evaluated at all points at once. Returns x
+        (npoints x gdim) and J, n, tau as geometry.
+        '''
+        points = asarray(points, dtype=float)
+        npoints, tdim, gdim = len(points), self._tdim, self._gdim
+        # Affine is one matrix multiply and constant Jacobian matrix
+        if self._affine_array is not None:
+            A, b = self._affine_array
+            x = points.dot(A.T) + b
+            Jac = broadcast_to(A, (npoints, gdim, tdim))
+        else:
+            if self._compiled_geometry is None:
+                xyz = symbols('x, y, z')
+                self._compiled_geometry = lambdify(
+                    self._pdomain.variables,
+                    [self._mapping[var] for var in xyz[:gdim]] + list(self._Jac),
+                    'numpy')
+            values = empty((gdim + gdim*tdim, npoints))
+            # Constant components come out as numbers and are broadcast
+            for i, value in enumerate(self._compiled_geometry(*points.T)):
+                values[i] = value
+            x = values[:gdim].T
+            Jac = values[gdim:].T.reshape((npoints, gdim, tdim))
+
+        sign = 1 if self._orientation == '+' else -1
+        n, tau = None, None
+        # Volumes
+        if tdim == gdim:
+            J = fabs(det(Jac))
+        # Curves
+        elif tdim == 1:
+            tau = Jac[:, :, 0]
+            J = norm(tau, axis=1)
+            # Rotated tangent
+            if gdim == 2:
+                n = sign*array([-tau[:, 1], tau[:, 0]]).T
+        # Surfaces
+        else:
+            n = sign*npcross(Jac[:, :, 0], Jac[:, :, 1])
+            J = norm(n, axis=1)
+        return x, J, n, tau
+
+    def sample(self, npoints, seed=None):
+        '''
+        Geometry at npoints random points of the parameter domain, obtained
+        from uniformly distributed points of the unit cube as random_points.
+        Returns parameters (npoints x tdim) followed by x, J, n, tau of
+        evaluate.
+        '''
+        rng = seed if isinstance(seed, RandomState) else RandomState(seed)
+        points, _ = self._pdomain.from_unit_cube(rng.rand(npoints, self.tdim))
+        return (points, ) + self.evaluate(points)
+
+    def sample_grid(self, n):
+        '''
+        Geometry on structured grid of n points (int or one per parameter)
+        of the parameter domain. Uniform grid of the unit cube is mapped by
+        rescaling the nested bounds, e.g. t in (0, 1-s), so the rows of the
+        grid follow the domain. Returns parameters, x, J, n, tau as sample
+        with the leading axis replaced by the grid shape, for plotting and
+        export.
+        '''
+        tdim = self.tdim
+        shape = (n, )*tdim if isinstance(n, int) else tuple(n)
+        assert len(shape) == tdim, 'Need number of points per parameter'
+        u = meshgrid(*[linspace(0, 1, ni) for ni in shape], indexing='ij')
+        points, _ = self._pdomain.from_unit_cube(array([ui.flatten()
+                                                        for ui in u]).T)
+        arrays = (points, ) + self.evaluate(points)
+        return tuple(a if a is None else a.reshape(shape + a.shape[1:])
+                     for a in arrays)
+
+    def __reduce__(self):
+        '''
+        Pickle by parameter domain, mapping as canonical strings and
+        orientation. Geometry and compiled functions are rebuilt on demand.
+        '''
+        xyz = symbols('x, y, z')
+        return (_unpickle_set,
+                (type(self), self._pdomain,
+                 pack_expressions([self._mapping[var]
+                                   for var in xyz[:self.gdim]]),
+                 self._orientation))
+
+    def to_bytes(self):
+        '''Compact serialization.'''
+        return to_bytes(self)
+
+    @classmethod
+    def from_bytes(cls, data):
+        '''Set from bytes of to_bytes.'''
+        return from_bytes(data, cls)
 
     @property
     def tdim(self):
@@ -97,20 +238,70 @@ class ParametrizedSet(object):
 
     def substitute(self, f):
         '''Cartesian coordinates as functions of parameters.'''
+        # Affine mapping is just a replacement of symbols
+        if self._affine is not None:
+            return f.xreplace(self._mapping)
         return f.subs(self._mapping)
 
+    @property
+    def affine(self):
+        '''Exact (A, b) of affine mapping x = A*p + b. None if not affine.'''
+        return self._affine
+
+    @property
+    def affine_array(self):
+        '''(A, b) of affine mapping as NumPy arrays. None if not affine.'''
+        return self._affine_array
+
+    def map_points(self, points):
+        '''Map points (npoints x tdim) of parameter domain to R^gdim.'''
+        points = asarray(points, dtype=float)
+        # Affine is one matrix multiply
+        if self._affine_array is not None:
+            A, b = self._affine_array
+            return points.dot(A.T) + b
+
+        if self._compiled_mapping is None:
+            xyz = symbols('x, y, z')
+            self._compiled_mapping = lambdify(self._pdomain.variables,
+                                              [self._mapping[var]
+                                               for var in xyz[:self.gdim]],
+                                              'numpy')
+        x = empty((len(points), self.gdim))
+        for i, xi in enumerate(self._compiled_mapping(*points.T)):
+            x[:, i] = xi
+        return x
+
+    def random_points(self, npoints, seed=None):
+        '''
+        Points (npoints x gdim) of the set obtained by mapping uniformly
+        distributed points of unit cube to parameter domain and then to R^gdim.
+        '''
+        rng = seed if isinstance(seed, RandomState) else RandomState(seed)
+        points, _ = self._pdomain.from_unit_cube(rng.rand(npoints, self.tdim))
+        return self.map_points(points)
+
     @property
     def items(self):
         '''Iterator over parameters of the set and their bounds.'''
         return self._pdomain.items
 
+    @property
+    def pdomain(self):
+        '''ParameterDomain of the set.'''
+        return self._pdomain
+
     @property
     def J(self):
         '''Jacobian.'''
+        if not self._symbolic_geometry:
+            self._build_geometry()
         return self._J
     
     @property
     def tau(self):
+        if not self._symbolic_geometry:
+            self._build_geometry()
         if self._tau is not None:
             return self._tau
         else:
@@ -119,6 +310,8 @@ class ParametrizedSet(object):
 
     @property
     def n(self):
+        if not self._symbolic_geometry:
+            self._build_geometry()
         if self._n is not None:
             return self._n
         else:
@@ -134,6 +327,8 @@ class SimplexSet(ParametrizedSet):
         assert all(gdim == len(v) for v in vertices[1:]), \
             'Vertices of different length'
 
+        # Kept for pickling
+        self._vertices = tuple(vertices)
         # Check degeneracy
         mat = array([vertex if isinstance(vertex, ndarray) else array(vertex)
                     for vertex in vertices])
@@ -144,17 +339,22 @@ class SimplexSet(ParametrizedSet):
         smbls = __symbols__
         tdim = len(vertices) - 1
         # Build mapping, A*(1-s) + B*s etc
-        foo = [1-sum([s for s in smbls[:tdim]])] + list(smbls)
-        mapping = tuple(sum(vtx[dim]*sym for vtx, sym in zip(vertices, foo))
+        foo = [1-Add(*smbls[:tdim])] + list(smbls)
+        mapping = tuple(Add(*[vtx[dim]*sym for vtx, sym in zip(vertices, foo)])
                         for dim in range(gdim))
 
         # Build domain (s, (0, 1)), (r, (0, 1-s)), ...
-        domain = tuple((smbls[dim], (0, 1-sum(s for s in smbls[:dim])))
+        domain = tuple((smbls[dim], (0, 1-Add(*smbls[:dim])))
                        for dim in range(tdim))
         domain = ParameterDomain(*domain)
 
         ParametrizedSet.__init__(self, domain, mapping)
 
+    def __reduce__(self):
+        '''Pickle by vertices, raw NumPy array if they are numbers.'''
+        return (_unpickle_simplex,
+                (type(self), pack_expressions(map(list, self._vertices))))
+
 
 class Line(SimplexSet):
     '''
@@ -194,6 +394,8 @@ class CartesianSet(ParametrizedSet):
         assert all(map(lambda pair: pair[1] > pair[0], intervals)),\
             'Not increasing interval'
 
+        # Kept for pickling
+        self._intervals = intervals
         tdim = len(intervals)
         smbls = __symbols__
         # Build domain
@@ -207,6 +409,16 @@ class CartesianSet(ParametrizedSet):
 
         ParametrizedSet.__init__(self, domain, mapping)
 
+    @property
+    def intervals(self):
+        '''Intervals [a, b] of the product.'''
+        return self._intervals
+
+    def __reduce__(self):
+        '''Pickle by intervals, raw NumPy array if they are numbers.'''
+        return (_unpickle_cartesian,
+                (type(self), pack_expressions(map(list, self._intervals))))
+
 
 class Interval(CartesianSet):
     '''Interval [a, b] desribed as x = 0.5*a(1-s) + 0.5*b(1+s), s in [-1, 1].'''
@@ -233,6 +445,27 @@ class Box(CartesianSet):
         CartesianSet.__init__(self, [xI, yI, zI])
 
 
+def _unpickle_set(cls, pdomain, mapping, orientation):
+    '''Set from parameter domain and packed mapping.'''
+    pset = cls.__new__(cls)
+    ParametrizedSet.__init__(pset, pdomain, unpack_expressions(mapping),
+                             orientation)
+    return pset
+
+
+def _unpickle_simplex(cls, vertices):
+    '''SimplexSet or its subclass from packed vertices.'''
+    pset = cls.__new__(cls)
+    SimplexSet.__init__(pset, unpack_expressions(vertices))
+    return pset
+
+
+def _unpickle_cartesian(cls, intervals):
+    '''CartesianSet or its subclass from packed intervals.'''
+    pset = cls.__new__(cls)
+    CartesianSet.__init__(pset, unpack_expressions(intervals))
+    return pset
+
 # -----------------------------------------------------------------------------
 
 
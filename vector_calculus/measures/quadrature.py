@@ -0,0 +1,142 @@
+from parametrized_set import SimplexSet, CartesianSet
+from numpy import array, meshgrid, prod, asarray, zeros, log, ceil
+from numpy.random import RandomState
+from numpy.polynomial.legendre import leggauss
+
+# Bases of Halton sequence in 1d, 2d, 3d
+__primes__ = (2, 3, 5)
+
+
+def gauss_legendre(n):
+    '''Gauss-Legendre points and weights of n-point rule on [-1, 1].'''
+    assert n > 0, 'Need at least one point'
+    return leggauss(n)
+
+
+def _tensor_product(x, w, tdim):
+    '''Points (npoints x tdim) and weights of tdim fold product of 1d rule.'''
+    points = array([X.flatten() for X in meshgrid(*[x]*tdim, indexing='ij')]).T
+    weights = prod([W.flatten() for W in meshgrid(*[w]*tdim, indexing='ij')],
+                   axis=0)
+    return points, weights
+
+
+def cube_rule(tdim, degree):
+    '''
+    Rule on the reference cube [-1, 1]^tdim of CartesianSet which is exact for
+    polynomials of given degree in each parameter.
+    '''
+    assert 0 < tdim < 4, 'Only 1d, 2d, 3d'
+    x, w = gauss_legendre(degree/2 + 1)
+    return _tensor_product(x, w, tdim)
+
+
+def simplex_rule(tdim, degree):
+    '''
+    Rule on the reference simplex of SimplexSet, i.e. s in [0, 1], t in
+    [0, 1-s], r in [0, 1-s-t], which is exact for polynomials of given degree.
+    Points of the Gauss rule on [0, 1]^tdim are collapsed to the simplex
+    with s = u, t = (1-s)*v, r = (1-s-t)*w.
+    '''
+    assert 0 < tdim < 4, 'Only line, triangle, tetrahedron'
+    # The collapse adds a polynomial of degree tdim-1 to the integrand
+    x, w = gauss_legendre((degree + tdim - 1)/2 + 1)
+    x, w = 0.5*(x + 1), 0.5*w
+    points, weights = _tensor_product(x, w, tdim)
+
+    # Jacobian of the collapse is (1-u)^(tdim-1)*(1-v)^(tdim-2)
+    for i in range(1, tdim):
+        weights *= (1 - points[:, i-1])**(tdim - i)
+    for i in range(1, tdim):
+        points[:, i] *= 1 - points[:, :i].sum(axis=1)
+    return points, weights
+
+
+def nested_rule(pdomain, degree):
+    '''
+    Rule on ParameterDomain whose bounds depend on earlier parameters, e.g.
+    t in (0, 1-s) or t in (0, sqrt(1-s**2)). Gauss rule on [0, 1]^d is
+    mapped level by level by rescaling the inner interval with the compiled
+    bounds (ParameterDomain.from_unit_cube) and the weights include the
+    lengths of the intervals. Like simplex_rule this is exact for polynomials
+    of given degree when bounds are affine; curved bounds are integrated to
+    the accuracy of the rule.
+    '''
+    tdim = len(pdomain)
+    assert 0 < tdim < 4, 'Only 1d, 2d, 3d'
+    # Affine bounds add a polynomial of degree tdim-1 to the integrand
+    x, w = gauss_legendre((degree + tdim - 1)/2 + 1)
+    points, weights = _tensor_product(0.5*(x + 1), 0.5*w, tdim)
+    points, J = pdomain.from_unit_cube(points)
+    return points, weights*J
+
+
+def box_map(pdomain):
+    '''
+    Scaling and shift (x = scale*X + shift) of the affine map from the
+    reference cube [-1, 1]^tdim to parameter domain which is a box, None if
+    bounds depend on other parameters.
+    '''
+    if not all(bound.is_number
+               for var, bounds in pdomain.items() for bound in bounds):
+        return None
+    lower, upper = array([map(float, pdomain[var])
+                          for var in pdomain.variables]).T
+    return 0.5*(upper - lower), 0.5*(upper + lower)
+
+
+def reference_rule(pset, degree):
+    '''Quadrature rule in the parameter domain of parametrized set.'''
+    if isinstance(pset, SimplexSet):
+        return simplex_rule(pset.tdim, degree)
+    elif isinstance(pset, CartesianSet):
+        return cube_rule(pset.tdim, degree)
+    # Parameter domain which is a box is a rescaled reference cube
+    box = box_map(pset.pdomain)
+    if box is not None:
+        scale, shift = box
+        points, weights = cube_rule(pset.tdim, degree)
+        return scale*points + shift, weights*prod(scale)
+    # Bounds depending on other parameters
+    return nested_rule(pset.pdomain, degree)
+
+
+def halton_scrambling(dim, seed=None):
+    '''
+    Random digit permutations which define one scrambling of Halton sequence
+    in [0, 1]^dim. Every digit of every base gets its own permutation.
+    '''
+    assert 0 < dim < 4, 'Only 1d, 2d, 3d'
+    rng = seed if isinstance(seed, RandomState) else RandomState(seed)
+    # Enough digits to fill double precision
+    return [array([rng.permutation(base)
+                   for digit in range(int(ceil(53*log(2)/log(base))))])
+            for base in __primes__[:dim]]
+
+
+def scrambled_halton(indices, scrambling):
+    '''Points (npoints x dim) of scrambled Halton sequence with indices.'''
+    indices = asarray(indices, dtype='int64')
+    points = zeros((len(indices), len(scrambling)))
+    last = indices.max() if len(indices) else 0
+    for i, (base, permutations) in enumerate(zip(__primes__, scrambling)):
+        scale = 1.
+        for k, permutation in enumerate(permutations):
+            scale /= base
+            # Beyond the last index all the digits are 0 and the permuted
+            # digit is the same for all points
+            if base**k > last:
+                points[:, i] += permutation[0]*scale
+            else:
+                points[:, i] += permutation[(indices // base**k) % base]*scale
+    return points
+
+# -----------------------------------------------------------------------------
+
+
+if __name__ == '__main__':
+    # Area of reference triangle and volume of reference tetrahedron
+    print simplex_rule(2, 1)[1].sum(), simplex_rule(3, 1)[1].sum()
+    # int_T s*t = 1/24
+    points, weights = simplex_rule(2, 2)
+    print (points[:, 0]*points[:, 1]*weights).sum(), 1/24.
@@ -1,7 +1,8 @@
 from sympy import Expr, Number, NumberSymbol
-from vector_calculus.containers import Vector, Tensor
+from vector_calculus.containers import Vector, Tensor, Polynomial
 from vector_calculus.operators import dot, inner
 from measure import Measure
+from numpy import einsum
 
 
 class SurfaceMeasure(Measure):
@@ -20,7 +21,10 @@ class SurfaceMeasure(Measure):
         '''Integrate over domain.'''
         # Scalar integral is f(x(s, t), y(s, t))*|d(x, y)/ds x d(x, y)/dt| ds dt
         # Result is number
-        if isinstance(integrand, (Expr, Number, NumberSymbol, int, float)):
+        if isinstance(integrand, (Expr, Number, NumberSymbol, int, float,
+                                  Polynomial)):
+            if isinstance(integrand, Polynomial):
+                integrand = integrand.as_expr()
             # Note that Jacobian for thich domain is defines as size of the
             # normal vector
             integrand = integrand*self.domain.J
@@ -37,12 +41,24 @@ class SurfaceMeasure(Measure):
         # Result is vector
         elif isinstance(integrand, Tensor):
             assert len(integrand) == self.domain.gdim, 'Gdim mismatch'
-            integrand = dot(integrand, self.domain.n)
-            return Vector([vi*self for vi in integrand])
+            # Weight of components is in n
+            return self._integrate_field(dot(integrand, self.domain.n), 1)
         # Nope 
         else:
             raise TypeError('No surface integral of type %s' % type(integrand))
 
+    def _weight(self, values, J, n, tau):
+        '''Integrand values at quadrature points weighted as in __rmul__.'''
+        # Scalar, f*J
+        if values.ndim == 1:
+            return values*J
+        # Vector, inner(f, n)
+        elif values.ndim == 2:
+            return einsum('iq,qi->q', values, n)
+        # Tensor, dot(f, n)
+        else:
+            return einsum('ijq,qj->iq', values, n)
+
 
 class dS(SurfaceMeasure):
     '''
@@ -1,5 +1,12 @@
 from measure import Measure
 from parametrized_set import Triangle, Tetrahedron, Rectangle, Box, Interval
+from parametrized_set import CartesianSet
+from quadrature import halton_scrambling, scrambled_halton
+from chebyshev import ChebyshevSurrogate
+from vector_calculus.containers import Vector, Tensor
+from vector_calculus.operators import lambdify_field, xyz, GridFunction
+from numpy import arange, array, sqrt
+from numpy.random import RandomState
 
 
 class VolumeMeasure(Measure):
@@ -16,11 +23,80 @@ class VolumeMeasure(Measure):
 
     def __rmul__(self, integrand):
         '''Integrate over domain.'''
+        # Vector and Tensor integrals are Vector and Tensor of component
+        # integrals sharing substitution and Jacobian
+        if isinstance(integrand, (Vector, Tensor)):
+            assert len(integrand) == self.domain.gdim, 'Gdim mismatch'
+            return self._integrate_field(integrand, self.domain.J)
+        # Sampled data is integrated by the quadrature of its grid
+        if isinstance(integrand, GridFunction):
+            self._assert_covers(integrand.grid.intervals)
+            return integrand.integrate()
+        # Surrogate is integrated by its coefficients
+        if isinstance(integrand, ChebyshevSurrogate):
+            self._assert_covers(integrand.intervals)
+            return integrand.integrate()
         # Add Jacobian
         integrand = integrand*self.domain.J
         return self(integrand)
 
-        # FIXME convenience functions for Vector and Tensor
+    def _assert_covers(self, intervals):
+        '''Numeric data over intervals must be over the cartesian domain.'''
+        assert isinstance(self.domain, CartesianSet), \
+            'Numeric data integrates over Interval, Rectangle or Box only'
+        assert intervals == tuple(tuple(map(float, I))
+                                  for I in self.domain.intervals), \
+            'Data does not cover the domain'
+
+    def surrogate(self, integrand, tol=1E-10, max_degree=128):
+        '''
+        ChebyshevSurrogate of integrand over the cartesian domain for
+        repeated evaluation, integration (also with weights) and derivatives.
+        '''
+        assert isinstance(self.domain, CartesianSet), \
+            'Surrogates are built over Interval, Rectangle or Box only'
+        return ChebyshevSurrogate(integrand, self.domain, tol, max_degree)
+
+    def qmc(self, integrand, tol=1E-6, replicas=8, chunk_size=1024,
+            max_points=2**20, seed=None):
+        '''
+        Randomized quasi-Monte Carlo integration of scalar integrand. Each of
+        the replicas uses independently scrambled Halton points in the unit
+        cube mapped to the parameter domain by rescaling its bounds. Points
+        are added in chunks until the standard error of replicas' estimates
+        is below tol or max_points per replica have been used. Returns the
+        estimate and its standard error.
+        '''
+        assert replicas > 1, 'Need replicas for error estimate'
+        domain = self.domain
+        pdomain = domain.pdomain
+        # Affine maps points with matrix multiply and has constant Jacobian
+        if domain.affine is not None:
+            f = lambdify_field(integrand, xyz[:domain.gdim])
+            detJ = float(domain.J)
+            g = lambda points: f(*domain.map_points(points).T)*detJ
+        else:
+            f = lambdify_field(domain.substitute(integrand*domain.J),
+                               pdomain.variables)
+            g = lambda points: f(*points.T)
+
+        rng = seed if isinstance(seed, RandomState) else RandomState(seed)
+        scramblings = [halton_scrambling(len(pdomain), rng)
+                       for replica in range(replicas)]
+        sums = array([0.]*replicas)
+        npoints = 0
+        while True:
+            indices = arange(npoints, min(npoints+chunk_size, max_points))
+            for i, scrambling in enumerate(scramblings):
+                points, J = pdomain.from_unit_cube(scrambled_halton(indices,
+                                                                    scrambling))
+                sums[i] += (g(points)*J).sum()
+            npoints += len(indices)
+
+            estimates = sums/npoints
+            error = estimates.std(ddof=1)/sqrt(replicas)
+            if error < tol or npoints >= max_points:
+                return estimates.mean(), error
 
 
 class dV(VolumeMeasure):
@@ -90,3 +166,7 @@ if __name__ == '__main__':
 
     # print 1*VolumeMeasure(Interval(1, 10))
     # print quad(lambdify(x, S(1)), [1, 10])
+
+    from sympy import sin
+    f = abs(sin(10*x*y*z))
+    print dx.qmc(f, tol=1E-5)
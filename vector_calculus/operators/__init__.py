@@ -1,2 +1,6 @@
 from linalg import *
 from calculus import *
+from evaluation import *
+from coordinates import *
+from autodiff import *
+from grid import *
@@ -0,0 +1,399 @@
+import numpy as np
+from itertools import count
+from sympy import Expr
+from vector_calculus.containers import Vector, Tensor, Polynomial
+
+# Tags tell apart derivatives of nested operators. Later tags are outer
+__tags__ = count(1)
+
+
+def _lift(a, tag):
+    '''Value and derivative of a with respect to tag.'''
+    if isinstance(a, Dual) and a.tag == tag:
+        return a.value, a.deriv
+    return a, 0
+
+
+def _tag(*args):
+    '''Outermost tag of the arguments.'''
+    return max(a.tag for a in args if isinstance(a, Dual))
+
+
+def _add(a, b):
+    tag = _tag(a, b)
+    (av, ad), (bv, bd) = _lift(a, tag), _lift(b, tag)
+    return Dual(av + bv, ad + bd, tag)
+
+
+def _subtract(a, b):
+    tag = _tag(a, b)
+    (av, ad), (bv, bd) = _lift(a, tag), _lift(b, tag)
+    return Dual(av - bv, ad - bd, tag)
+
+
+def _multiply(a, b):
+    tag = _tag(a, b)
+    (av, ad), (bv, bd) = _lift(a, tag), _lift(b, tag)
+    return Dual(av*bv, ad*bv + av*bd, tag)
+
+
+def _divide(a, b):
+    tag = _tag(a, b)
+    (av, ad), (bv, bd) = _lift(a, tag), _lift(b, tag)
+    return Dual(av/bv, ad/bv - av*bd/(bv*bv), tag)
+
+
+def _power(a, b):
+    tag = _tag(a, b)
+    (av, ad), (bv, bd) = _lift(a, tag), _lift(b, tag)
+    value = av**bv
+    # Constant exponent avoids log of negative base
+    if isinstance(bd, int) and bd == 0:
+        return Dual(value, bv*av**(bv - 1)*ad, tag)
+    return Dual(value, value*(bd*np.log(av) + bv*ad/av), tag)
+
+
+def _arctan2(a, b):
+    tag = _tag(a, b)
+    (av, ad), (bv, bd) = _lift(a, tag), _lift(b, tag)
+    return Dual(np.arctan2(av, bv), (ad*bv - av*bd)/(av*av + bv*bv), tag)
+
+
+# Derivatives of functions of one argument in terms of the argument
+__unary__ = {
+    'negative': lambda v: -1,
+    'sin': np.cos,
+    'cos': lambda v: -np.sin(v),
+    'tan': lambda v: 1 + np.tan(v)**2,
+    'exp': np.exp,
+    'log': lambda v: 1/v,
+    'sqrt': lambda v: 0.5/np.sqrt(v),
+    'square': lambda v: 2*v,
+    'arcsin': lambda v: 1/np.sqrt(1 - v*v),
+    'arccos': lambda v: -1/np.sqrt(1 - v*v),
+    'arctan': lambda v: 1/(1 + v*v),
+    'sinh': np.cosh,
+    'cosh': np.sinh,
+    'tanh': lambda v: 1 - np.tanh(v)**2,
+    'absolute': np.sign,
+    'sign': lambda v: 0,
+}
+
+__binary__ = {
+    'add': _add,
+    'subtract': _subtract,
+    'multiply': _multiply,
+    'divide': _divide,
+    'true_divide': _divide,
+    'power': _power,
+    'arctan2': _arctan2,
+}
+
+
+class Dual(object):
+    '''
+    Dual number value + deriv*eps over NumPy arrays for forward-mode
+    differentiation. Value and derivative can be Duals with earlier tags,
+    which gives higher derivatives of nested operators. NumPy ufuncs of
+    Duals are Duals.
+    '''
+
+    __slots__ = ('value', 'deriv', 'tag')
+
+    def __init__(self, value, deriv, tag):
+        self.value = value
+        self.deriv = deriv
+        self.tag = tag
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        '''Ufuncs of Duals by the chain rule.'''
+        if method != '__call__' or kwargs:
+            return NotImplemented
+        name = ufunc.__name__
+        if name in __binary__ and len(inputs) == 2:
+            return __binary__[name](*inputs)
+        if name in __unary__ and len(inputs) == 1:
+            a = inputs[0]
+            return Dual(ufunc(a.value), __unary__[name](a.value)*a.deriv,
+                        a.tag)
+        return NotImplemented
+
+    def __add__(self, other):
+        return _add(self, other)
+
+    def __radd__(self, other):
+        return _add(other, self)
+
+    def __sub__(self, other):
+        return _subtract(self, other)
+
+    def __rsub__(self, other):
+        return _subtract(other, self)
+
+    def __mul__(self, other):
+        return _multiply(self, other)
+
+    def __rmul__(self, other):
+        return _multiply(other, self)
+
+    def __div__(self, other):
+        return _divide(self, other)
+
+    def __rdiv__(self, other):
+        return _divide(other, self)
+
+    __truediv__ = __div__
+    __rtruediv__ = __rdiv__
+
+    def __pow__(self, other):
+        return _power(self, other)
+
+    def __rpow__(self, other):
+        return _power(other, self)
+
+    def __neg__(self):
+        return Dual(-self.value, -self.deriv, self.tag)
+
+    def __pos__(self):
+        return self
+
+    def __abs__(self):
+        return np.absolute(self)
+
+    # Comparisons of values allow branches in fields
+    def __lt__(self, other):
+        return _value(self) < _value(other)
+
+    def __le__(self, other):
+        return _value(self) <= _value(other)
+
+    def __gt__(self, other):
+        return _value(self) > _value(other)
+
+    def __ge__(self, other):
+        return _value(self) >= _value(other)
+
+
+def _value(a):
+    '''Value of (nested) Dual.'''
+    while isinstance(a, Dual):
+        a = a.value
+    return a
+
+
+def _derivative(a, tag):
+    '''Derivative of a (nested Dual or number) with respect to tag.'''
+    if not isinstance(a, Dual):
+        return 0*a
+    if a.tag == tag:
+        return a.deriv
+    return Dual(_derivative(a.value, tag), _derivative(a.deriv, tag), a.tag)
+
+
+def _is_leaf(a, ndim):
+    '''Component of field evaluated at points with ndim dimensions.'''
+    return isinstance(a, (Dual, int, float)) or \
+        (isinstance(a, np.ndarray) and a.dtype != object and a.ndim <= ndim)
+
+
+def _tree(a, ndim):
+    '''Field value as nested lists of components.'''
+    if _is_leaf(a, ndim):
+        return a
+    return [_tree(ai, ndim) for ai in a]
+
+
+def _map(f, *trees):
+    '''Apply f to leaves of trees with the same structure.'''
+    if not isinstance(trees[0], list):
+        return f(*trees)
+    return [_map(f, *items) for items in zip(*trees)]
+
+
+def _output(tree):
+    '''Array with field axes first if there are no Duals, else the tree.'''
+    leaves = []
+    _map(leaves.append, tree)
+    if any(isinstance(leaf, Dual) for leaf in leaves):
+        return tree
+    # Constant components are broadcast to the shape of points
+    shape = reduce(lambda shape, leaf: np.broadcast(np.empty(shape), leaf).shape,
+                   leaves, ())
+    return np.array(_map(lambda leaf: np.broadcast_to(leaf, shape), tree),
+                    dtype=float)
+
+
+def _points(X):
+    '''Coordinates as arrays and number of dimensions of their shape.'''
+    X = [x if isinstance(x, Dual) else np.asarray(x, dtype=float) for x in X]
+    return X, max(np.ndim(_value(x)) for x in X)
+
+
+def _partial(u, X, i):
+    '''Tree of derivatives of field u w.r.t coordinate i at points X.'''
+    X, ndim = _points(X)
+    tag = next(__tags__)
+    seeded = list(X)
+    seeded[i] = Dual(X[i], 1., tag)
+    return _map(lambda c: _derivative(c, tag), _tree(u(*seeded), ndim))
+
+
+def Dx_field(u, i):
+    '''Partial derivative of callable field w.r.t coordinate i (0, 1, 2).'''
+    return lambda *X: _output(_partial(u, X, i))
+
+
+def grad_field(u):
+    '''
+    Gradient of callable field u(x, y[, z]). Scalar --> vector, vector -->
+    tensor, the derivative index is the last one.
+    '''
+    def field(*X):
+        partials = [_partial(u, X, i) for i in range(len(X))]
+        return _output(_map(lambda *ds: list(ds), *partials))
+    return field
+
+
+def div_field(u):
+    '''Divergence of callable field. Vector --> scalar, tensor --> vector.'''
+    def field(*X):
+        partials = [_partial(u, X, i) for i in range(len(X))]
+        # Vector
+        if not isinstance(partials[0][0], list):
+            return _output(sum(d[i] for i, d in enumerate(partials)))
+        # Tensor, rows
+        return _output([sum(d[j][i] for i, d in enumerate(partials))
+                        for j in range(len(partials[0]))])
+    return field
+
+
+def curl_field(u):
+    '''Curl of callable field. 3d vector --> vector, 2d vector --> scalar.'''
+    def field(*X):
+        d = [_partial(u, X, i) for i in range(len(X))]
+        if len(X) == 2:
+            return _output(d[0][1] - d[1][0])
+        return _output([d[1][2] - d[2][1], d[2][0] - d[0][2],
+                        d[0][1] - d[1][0]])
+    return field
+
+
+def rot_field(u, orientation='+'):
+    '''Rotation of callable 2d scalar field --> vector.'''
+    sign = 1 if orientation == '+' else -1
+
+    def field(*X):
+        assert len(X) == 2, 'Rotation of 2d scalar only'
+        dx, dy = [_partial(u, X, i) for i in range(2)]
+        return _output([-sign*dy, sign*dx])
+    return field
+
+
+def laplace_field(u):
+    '''Laplacian of callable field. Scalar --> scalar, vector --> vector.'''
+    def field(*X):
+        g = grad_field(u)
+        partials = [_partial(g, X, i) for i in range(len(X))]
+        # Scalar, the gradient is a vector
+        if not isinstance(partials[0][0], list):
+            return _output(sum(d[i] for i, d in enumerate(partials)))
+        return _output([sum(d[j][i] for i, d in enumerate(partials))
+                        for j in range(len(partials[0]))])
+    return field
+
+
+def pointwise_field(f, *fields):
+    '''
+    Field whose value at each point is f of the values of fields, given as
+    nested lists of components. Linear algebra on callable fields uses it.
+    '''
+    def field(*X):
+        X, ndim = _points(X)
+        return _output(f(*[_tree(u(*X), ndim) for u in fields]))
+    return field
+
+
+def is_field(u):
+    '''True if u is a callable field, e.g. a NumPy function of x, y[, z].'''
+    return callable(u) and not isinstance(u, (Expr, Polynomial, Vector, Tensor))
+
+
+def _transpose(A):
+    return [list(row) for row in zip(*A)]
+
+
+def _tr(A):
+    return sum(A[i][i] for i in range(len(A)))
+
+
+def _inner(u, v):
+    if isinstance(u[0], list):
+        return sum(_inner(ui, vi) for ui, vi in zip(u, v))
+    return sum(ui*vi for ui, vi in zip(u, v))
+
+
+def _dot(A, u):
+    # A.u
+    if isinstance(A[0], list):
+        if isinstance(u[0], list):
+            return [_dot(A, col) for col in _transpose(u)]
+        return [_inner(Ai, u) for Ai in A]
+    # u.A
+    return _dot(_transpose(u), A)
+
+
+def transpose_field(A):
+    '''Transpose of callable tensor field.'''
+    return pointwise_field(_transpose, A)
+
+
+def sym_field(A):
+    '''Symmetric part of callable tensor field.'''
+    return pointwise_field(
+        lambda A: [[0.5*(A[i][j] + A[j][i]) for j in range(len(A))]
+                   for i in range(len(A))], A)
+
+
+def skew_field(A):
+    '''Skew part of callable tensor field.'''
+    return pointwise_field(
+        lambda A: [[0.5*(A[i][j] - A[j][i]) for j in range(len(A))]
+                   for i in range(len(A))], A)
+
+
+def tr_field(A):
+    '''Trace of callable tensor field.'''
+    return pointwise_field(_tr, A)
+
+
+def deviatoric_field(A):
+    '''Deviatoric part of callable tensor field.'''
+    def dev(A):
+        n, trace = len(A), _tr(A)
+        return [[A[i][j] - trace/float(n) if i == j else A[i][j]
+                 for j in range(n)] for i in range(n)]
+    return pointwise_field(dev, A)
+
+
+def inner_field(u, v):
+    '''Inner product of callable vector or tensor fields.'''
+    return pointwise_field(_inner, u, v)
+
+
+def dot_field(A, u):
+    '''Dot product of callable vector/tensor fields.'''
+    return pointwise_field(_dot, A, u)
+
+# -----------------------------------------------------------------------------
+
+
+if __name__ == '__main__':
+    x = np.linspace(0, 1, 5)
+    y = np.linspace(1, 2, 5)
+
+    u = lambda x, y: [np.sin(x*y), x**2*y]
+    # Exact derivatives at all points at once
+    print grad_field(u)(x, y)[0, 0] - y*np.cos(x*y)
+    # Second derivatives
+    print div_field(sym_field(grad_field(u)))(x, y)
+    print laplace_field(lambda x, y: x**3*y**2)(x, y) - (6*x*y**2 + 2*x**3)
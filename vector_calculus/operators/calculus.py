@@ -1,27 +1,49 @@
 from vector_calculus.containers import *
 from sympy import symbols, Expr, S
 from linalg import tr, dot
+from autodiff import is_field, Dx_field, grad_field, div_field, curl_field
+from autodiff import rot_field, laplace_field
+from grid import GridFunction, Dx_grid, grad_grid, div_grid, curl_grid
+from grid import rot_grid, laplace_grid
 
 # These are cannonical variables of cartesian coordinate system
 xyz = symbols('x, y, z')
 
 
-def div(u):
-    '''Divergence of vector --> scalar. Divergence of tensor --> vector.'''
+def div(u, system=None):
+    '''
+    Divergence of vector --> scalar. Divergence of tensor --> vector. With
+    CoordinateSystem the vector is in the orthonormal basis of the system.
+    '''
+    if system is not None:
+        return system.div(u)
+    # Callable field is differentiated numerically by dual numbers
+    if is_field(u):
+        return div_field(u)
     # Vector
     if isinstance(u, Vector):
-        return sum((Dx(ui, vari) for ui, vari in zip(u, xyz)), S(0))
+        return add_terms(Dx(ui, vari) for ui, vari in zip(u, xyz))
     # Tensor, recurse rows
     elif isinstance(u, Tensor):
         return Vector([div(ui) for ui in u])
+    # Sampled data by differences on the grid
+    elif isinstance(u, GridFunction):
+        return div_grid(u)
     else:
         raise TypeError('Only divergence of vector or tensor allowed.')
 
 
-def grad(u, dim=None):
-    '''Gradient of vector --> tensor. Gradient of scalar --> vector.'''
+def grad(u, dim=None, system=None):
+    '''
+    Gradient of vector --> tensor. Gradient of scalar --> vector. With
+    CoordinateSystem only the gradient of scalar is defined.
+    '''
+    if system is not None:
+        return system.grad(u)
+    if is_field(u):
+        return grad_field(u)
     # Scalar
-    if isinstance(u, Expr):
+    if isinstance(u, (Expr, Polynomial)):
         # Infer dim from arguments of u
         if dim is None:
             # If there is no z dependence this is most likely a 2d scalar
@@ -35,12 +57,20 @@ def grad(u, dim=None):
     elif isinstance(u, Vector):
         dim = len(u)
         return Tensor([grad(ui, dim) for ui in u])
+    elif isinstance(u, GridFunction):
+        return grad_grid(u)
     else:
         raise ValueError('Only gradient of scalar or vector allowed.')
 
 
-def curl(u):
+def curl(u, system=None):
     '''Curl of 3d vector --> vector. Curl 2d vecror --> scalar.'''
+    if system is not None:
+        return system.curl(u)
+    if is_field(u):
+        return curl_field(u)
+    if isinstance(u, GridFunction):
+        return curl_grid(u)
     assert isinstance(u, Vector), 'Need vector for curl'
     if len(u) == 3:
         return -Vector([Dx(u[1], xyz[2]) - Dx(u[2], xyz[1]),
@@ -53,7 +83,11 @@ def curl(u):
 
 def rot(u, orientation='+'):
     '''Rotation of 2d scalar --> 2d vector. Default is counter-clockwise rot.'''
-    assert isinstance(u, Expr), 'Can only take rot of scalar'
+    if is_field(u):
+        return rot_field(u, orientation)
+    if isinstance(u, GridFunction):
+        return rot_grid(u, orientation)
+    assert isinstance(u, (Expr, Polynomial)), 'Can only take rot of scalar'
     assert xyz[2] not in u.atoms(), 'Scalar must be function of x, y only'
 
     R = Tensor([[0, -1], [1, 0]])
@@ -61,6 +95,24 @@ def rot(u, orientation='+'):
     return dot(R, grad(u))
 
 
+def laplace(u, system=None):
+    '''Laplacian of scalar --> scalar. Laplacian of vector --> vector.'''
+    if system is not None:
+        return system.laplace(u)
+    if is_field(u):
+        return laplace_field(u)
+    # Scalar
+    if isinstance(u, (Expr, Polynomial)):
+        return div(grad(u))
+    # Vector, component by component
+    elif isinstance(u, Vector):
+        return Vector([div(grad(ui, len(u))) for ui in u])
+    elif isinstance(u, GridFunction):
+        return laplace_grid(u)
+    else:
+        raise TypeError('Only laplacian of scalar or vector allowed.')
+
+
 def Dx(u, var):
     '''Partial derivative of u w.r.t to var. Shape is maintained.'''
     if isinstance(u, (int, float)):
@@ -68,11 +120,19 @@ def Dx(u, var):
     # Scalar
     if isinstance(u, Expr):
         return u.diff(var, 1)
+    # Polynomial differentiates its coefficients
+    elif isinstance(u, Polynomial):
+        return u.diff(var)
     # Vector
     elif isinstance(u, Vector):
         return Vector([Dx(ui, var) for ui in u])
-    # Tensor
+    # Tensor, keeps structure
     elif isinstance(u, Tensor):
-        return Tensor([Dx(ui, var) for ui in u])
+        return u.applyfunc(lambda uij: Dx(uij, var))
+    # Callable field, var is x, y, z or 0, 1, 2
+    elif is_field(u):
+        return Dx_field(u, var if isinstance(var, int) else xyz.index(var))
+    elif isinstance(u, GridFunction):
+        return Dx_grid(u, var if isinstance(var, int) else xyz.index(var))
     else:
         raise TypeError('Cannot take derivatieve of type %s' % type(u))
@@ -0,0 +1,129 @@
+from vector_calculus.containers import Vector
+from sympy import symbols, diff, sqrt, simplify, sin, cos, Add, Mul, Expr, S
+
+
+class CoordinateSystem(object):
+    '''
+    Orthogonal curvilinear coordinates q given by their map to cartesian
+    coordinates x(q). Vectors are expressed in the orthonormal basis of the
+    system. Scale factors h_i = |dx/dq_i| and the metric terms built from them
+    are simplified once when the system is created.
+    '''
+
+    def __init__(self, coordinates, mapping, scale_factors=None):
+        '''
+        Construct the system. Scale factors can be given if sympy cannot
+        simplify them, e.g. sqrt(r**2*sin(theta)**2) = r*sin(theta).
+        '''
+        assert len(coordinates) == len(mapping), 'Dimension mismatch'
+        assert len(coordinates) in (2, 3), 'Only 2d and 3d systems'
+        self.coordinates = tuple(coordinates)
+        self.mapping = tuple(S(x) for x in mapping)
+
+        if scale_factors is None:
+            scale_factors = [sqrt(Add(*[diff(x, q)**2 for x in self.mapping]))
+                             for q in self.coordinates]
+        h = tuple(simplify(hi) for hi in scale_factors)
+        self.h = h
+        # Volume element
+        self.H = simplify(Mul(*h))
+        # Metric terms of div, laplace and curl
+        self._div_factors = [simplify(self.H/hi) for hi in h]
+        self._laplace_factors = [simplify(self.H/hi**2) for hi in h]
+        if len(h) == 3:
+            self._curl_factors = [simplify(h[1]*h[2]), simplify(h[2]*h[0]),
+                                  simplify(h[0]*h[1])]
+
+    def __len__(self):
+        '''Dimension of the system.'''
+        return len(self.coordinates)
+
+    def from_cartesian(self, f):
+        '''Express f(x, y, z) in the coordinates of the system.'''
+        xyz = symbols('x, y, z')
+        return f.subs(dict(zip(xyz, self.mapping)))
+
+    def grad(self, f):
+        '''Gradient of scalar --> vector.'''
+        assert isinstance(f, Expr), 'Only gradient of scalar'
+        return Vector([diff(f, q)/hi for q, hi in zip(self.coordinates, self.h)])
+
+    def div(self, u):
+        '''Divergence of vector --> scalar.'''
+        assert isinstance(u, Vector) and len(u) == len(self), 'Need vector'
+        return Add(*[diff(factor*ui, q) for factor, ui, q in
+                     zip(self._div_factors, u, self.coordinates)])/self.H
+
+    def curl(self, u):
+        '''Curl of 3d vector --> vector. Curl of 2d vector --> scalar.'''
+        assert isinstance(u, Vector) and len(u) == len(self), 'Need vector'
+        q, h = self.coordinates, self.h
+        if len(self) == 2:
+            return (diff(h[1]*u[1], q[0]) - diff(h[0]*u[0], q[1]))/self.H
+
+        return Vector([(diff(h[(i+2) % 3]*u[(i+2) % 3], q[(i+1) % 3]) -
+                        diff(h[(i+1) % 3]*u[(i+1) % 3], q[(i+2) % 3]))/factor
+                       for i, factor in enumerate(self._curl_factors)])
+
+    def laplace(self, u):
+        '''Laplacian of scalar --> scalar. Laplacian of vector --> vector.'''
+        # Scalar
+        if isinstance(u, Expr):
+            return Add(*[diff(factor*diff(u, q), q) for factor, q in
+                         zip(self._laplace_factors, self.coordinates)])/self.H
+        # Vector, grad div - curl curl
+        elif isinstance(u, Vector):
+            if len(self) == 3:
+                return self.grad(self.div(u)) - self.curl(self.curl(u))
+            # In 2d curl of scalar c is (dc/dq1/h2, -dc/dq0/h1)
+            c = self.curl(u)
+            q, h = self.coordinates, self.h
+            return self.grad(self.div(u)) - Vector([diff(c, q[1])/h[1],
+                                                    -diff(c, q[0])/h[0]])
+        else:
+            raise TypeError('Only laplacian of scalar or vector allowed.')
+
+
+def Cartesian(dim=3):
+    '''Cartesian coordinates x, y(, z).'''
+    xyz = symbols('x, y, z')[:dim]
+    return CoordinateSystem(xyz, xyz, [S(1)]*dim)
+
+
+def Polar():
+    '''Polar coordinates x = r*cos(theta), y = r*sin(theta).'''
+    r, theta = symbols('r, theta', positive=True)
+    return CoordinateSystem((r, theta), (r*cos(theta), r*sin(theta)),
+                            (S(1), r))
+
+
+def Cylindrical():
+    '''Cylindrical coordinates x = r*cos(theta), y = r*sin(theta), z = z.'''
+    r, theta = symbols('r, theta', positive=True)
+    z = symbols('z')
+    return CoordinateSystem((r, theta, z), (r*cos(theta), r*sin(theta), z),
+                            (S(1), r, S(1)))
+
+
+def Spherical():
+    '''
+    Spherical coordinates x = r*sin(theta)*cos(phi), y = r*sin(theta)*sin(phi),
+    z = r*cos(theta) where theta is the polar angle.
+    '''
+    r, theta, phi = symbols('r, theta, phi', positive=True)
+    return CoordinateSystem((r, theta, phi),
+                            (r*sin(theta)*cos(phi), r*sin(theta)*sin(phi),
+                             r*cos(theta)),
+                            (S(1), r, r*sin(theta)))
+
+# -----------------------------------------------------------------------------
+
+
+if __name__ == '__main__':
+    system = Spherical()
+    r, theta, phi = system.coordinates
+    print system.h, system.H
+    # Laplacian of 1/r vanishes
+    print simplify(system.laplace(1/r))
+    # Curl of gradient vanishes
+    print system.curl(system.grad(r**2*sin(theta)*phi))
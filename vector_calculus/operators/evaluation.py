@@ -0,0 +1,152 @@
+from vector_calculus.containers import Vector, Tensor, Polynomial
+from sympy import lambdify, Expr, S, Dummy, simplify as sympy_simplify
+from sympy import cse as sympy_cse, numbered_symbols
+from numpy import asarray, broadcast_arrays, empty, isclose
+from numpy.random import RandomState
+from threading import Lock
+from calculus import xyz
+from autodiff import Dual
+
+
+def _shape(u):
+    '''Shape of scalar, Vector or Tensor field.'''
+    if isinstance(u, (int, float, Expr, Polynomial)):
+        return ()
+    elif isinstance(u, Vector):
+        return (len(u), )
+    elif isinstance(u, Tensor):
+        return (len(u), len(u))
+    else:
+        raise TypeError('No shape of type %s' % type(u))
+
+
+def _components(u):
+    '''Flat list of components of scalar, Vector or Tensor field.'''
+    if isinstance(u, Vector):
+        return list(u)
+    elif isinstance(u, Tensor):
+        return [Aij for row in u for Aij in row]
+    else:
+        return [S(u)]
+
+
+def lambdify_field(u, variables=None):
+    '''
+    Compile scalar, Vector or Tensor field to a NumPy function of variables
+    (x, y, z by default). The function returns array whose shape is the shape
+    of the field followed by the (broadcasted) shape of the arguments.
+    Common subexpressions of the components are computed once per point.
+    The function can be differentiated by autodiff.
+    '''
+    if variables is None:
+        variables = xyz
+
+    shape = _shape(u)
+    # Subexpressions shared by components are evaluated once, as in
+    # Vector.cse and Tensor.cse
+    replacements, components = sympy_cse(_components(u),
+                                         numbered_symbols('c', cls=Dummy))
+    arguments = tuple(variables) + tuple(c for c, expr in replacements)
+    nvars = len(variables)
+    definitions = [lambdify(arguments[:nvars+i], expr, 'numpy')
+                   for i, (c, expr) in enumerate(replacements)]
+    f = lambdify(arguments, components, 'numpy')
+
+    def field(*args):
+        '''Evaluate the field at points given by args.'''
+        # Dual numbers of autodiff go through the NumPy functions as they
+        # are, the field is nested lists of components
+        if any(isinstance(arg, Dual) for arg in args):
+            args = list(args)
+            for definition in definitions:
+                args.append(definition(*args))
+            values = list(f(*args))
+            for n in reversed(shape[1:]):
+                values = [values[i:i+n] for i in range(0, len(values), n)]
+            return values if shape else values[0]
+        args = list(broadcast_arrays(*[asarray(arg, dtype=float)
+                                       for arg in args]))
+        for definition in definitions:
+            args.append(definition(*args))
+        values = f(*args)
+        # Constant components come out as numbers so fill them in by hand
+        out = empty(shape + args[0].shape)
+        flat = out.reshape((-1, ) + args[0].shape)
+        for i, value in enumerate(values):
+            flat[i] = value
+        return out
+
+    return field
+
+
+# Compiled fields by (field, variables). Jobs of parallel quadrature often
+# compile the same integrand, possibly from several threads
+__compiled__ = {}
+__compiled_lock__ = Lock()
+
+
+def compile_field(u, variables=None):
+    '''lambdify_field with compiled functions cached for reuse.'''
+    key = (u, variables)
+    with __compiled_lock__:
+        f = __compiled__.get(key)
+    if f is None:
+        # Compiled outside the lock; a race only compiles twice
+        f = lambdify_field(u, variables)
+        with __compiled_lock__:
+            # Keep the cache from growing without bounds
+            if len(__compiled__) > 256:
+                __compiled__.clear()
+            __compiled__[key] = f
+    return f
+
+
+def allclose(u, v, domain=None, npoints=100, rtol=1E-8, atol=1E-10,
+             simplify=False, seed=None):
+    '''
+    Compare fields u, v numerically by evaluating them at npoints random
+    points of domain. Domain is a ParametrizedSet, list of intervals
+    [[a0, b0], [a1, b1], ...] or None for unit cube. Fields must depend
+    only on x, y, z. If simplify is True, the numerical verdict is confirmed
+    by simplifying the difference of components symbolically.
+    '''
+    if _shape(u) != _shape(v):
+        return False
+
+    rng = seed if isinstance(seed, RandomState) else RandomState(seed)
+    # Set
+    if hasattr(domain, 'random_points'):
+        points = domain.random_points(npoints, rng)
+    # Box
+    else:
+        if domain is None:
+            atoms = set.union(*[c.atoms()
+                                for c in _components(u) + _components(v)])
+            dim = max([i+1 for i, var in enumerate(xyz) if var in atoms] + [1])
+            domain = [[0, 1]]*dim
+        lower, upper = asarray(domain, dtype=float).T
+        points = lower + (upper - lower)*rng.rand(npoints, len(lower))
+    variables = xyz[:points.shape[1]]
+
+    u_values = lambdify_field(u, variables)(*points.T)
+    v_values = lambdify_field(v, variables)(*points.T)
+    if not isclose(u_values, v_values, rtol=rtol, atol=atol).all():
+        return False
+
+    if simplify:
+        return all(sympy_simplify(ui - vi) == 0
+                   for ui, vi in zip(_components(u), _components(v)))
+    return True
+
+# -----------------------------------------------------------------------------
+
+
+if __name__ == '__main__':
+    from numpy import linspace
+
+    x, y, z = xyz
+    f = lambdify_field(Vector([x*y, 1]), (x, y))
+    print f(linspace(0, 1, 3), 2)
+
+    from sympy import sin, cos
+    print allclose(sin(x)**2 + cos(x)**2, 1, simplify=True)
@@ -0,0 +1,325 @@
+from numpy import asarray, empty_like, zeros, ones, stack, meshgrid
+from numpy import linspace, pi, broadcast_to
+from numpy.fft import rfft, irfft, rfftfreq
+from numpy.linalg import solve
+from sympy import Expr
+
+
+class Grid(object):
+    '''
+    Uniform grid over Interval, Rectangle or Box (or list of intervals
+    [[a0, b0], ...]) with shape points per axis. Grid of non-periodic data
+    includes the end points of intervals, grid of periodic data leaves out
+    the right ones. Derivatives of sampled data are finite differences of
+    given (even) order or, for periodic data with spectral=True, FFT-spectral.
+    '''
+
+    def __init__(self, domain, shape, periodic=False, order=4, spectral=False):
+        intervals = getattr(domain, 'intervals', domain)
+        assert 0 < len(intervals) < 4, 'Only 1d, 2d, 3d'
+        if isinstance(shape, int):
+            shape = [shape]*len(intervals)
+        assert len(shape) == len(intervals), 'Shape does not match domain'
+        assert order > 0 and order % 2 == 0, 'Order must be even'
+        assert all(n > order for n in shape), 'Too few points for order'
+        assert periodic or not spectral, 'Spectral derivatives need periodic'
+
+        self.intervals = tuple((float(a), float(b)) for a, b in intervals)
+        self.shape = tuple(shape)
+        self.periodic = periodic
+        self.order = order
+        self.spectral = spectral
+        self.h = tuple((b - a)/(n if periodic else n - 1)
+                       for (a, b), n in zip(self.intervals, self.shape))
+
+    @property
+    def tdim(self):
+        '''Number of axes.'''
+        return len(self.shape)
+
+    def _key(self):
+        return (self.intervals, self.shape, self.periodic, self.order,
+                self.spectral)
+
+    def __eq__(self, other):
+        '''Grids are equal if they have same points and derivatives.'''
+        return isinstance(other, Grid) and self._key() == other._key()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def axes(self):
+        '''Coordinates of points along each axis.'''
+        return [linspace(a, b, n, endpoint=not self.periodic)
+                for (a, b), n in zip(self.intervals, self.shape)]
+
+    def coordinates(self):
+        '''Sparse (broadcastable) arrays of x, y[, z] of the points.'''
+        return meshgrid(*self.axes(), indexing='ij', sparse=True)
+
+    def sample(self, f):
+        '''
+        GridFunction of scalar, Vector or Tensor field, or NumPy function of
+        x, y[, z], at the points.
+        '''
+        if callable(f) and not isinstance(f, Expr):
+            values = f(*self.coordinates())
+        else:
+            # Evaluation imports calculus which imports this module
+            from evaluation import lambdify_field
+            from calculus import xyz
+            values = lambdify_field(f, xyz[:self.tdim])(*self.coordinates())
+        values = asarray(values, dtype=float)
+        field_shape = values.shape[:values.ndim - self.tdim]
+        return GridFunction(broadcast_to(values, field_shape + self.shape),
+                            self)
+
+    def weights(self):
+        '''
+        Quadrature weights along each axis: rectangle rule for periodic data,
+        otherwise composite Simpson (with 3/8 rule closing even number of
+        points). Both match the 4th order differences.
+        '''
+        return [_periodic_weights(n, h) if self.periodic
+                else _simpson_weights(n, h)
+                for n, h in zip(self.shape, self.h)]
+
+    def integrate(self, values):
+        '''Integral of values with field axes followed by grid axes.'''
+        values = asarray(values)
+        # Contract the last axis with its weights
+        for w in reversed(self.weights()):
+            values = values.dot(w)
+        return values
+
+
+def _periodic_weights(n, h):
+    '''Rectangle rule, spectrally accurate for periodic data.'''
+    return h*ones(n)
+
+
+def _simpson_weights(n, h):
+    '''Composite Simpson weights of n points with spacing h.'''
+    w = zeros(n)
+    if n == 2:
+        w[:] = h/2.
+        return w
+    # Even number of points closes with 3/8 rule over the last 3 intervals
+    m = n if n % 2 else n - 3
+    w[:m-1:2] += h/3.
+    w[1:m:2] += 4*h/3.
+    w[2:m:2] += h/3.
+    if m < n:
+        w[m-1:] += asarray([3., 9., 9., 3.])*h/8.
+    return w
+
+
+# Finite difference weights by offsets of the stencil
+__stencils__ = {}
+
+
+def _stencil(offsets):
+    '''Weights of first derivative at 0 from values at offsets (h = 1).'''
+    offsets = tuple(offsets)
+    if offsets not in __stencils__:
+        m = len(offsets)
+        V = asarray([[float(k)**j for k in offsets] for j in range(m)])
+        rhs = zeros(m)
+        rhs[1] = 1.
+        __stencils__[offsets] = solve(V, rhs)
+    return __stencils__[offsets]
+
+
+def _view(a, axis, start, stop):
+    '''Slice start:stop of a along axis, no copy.'''
+    index = [slice(None)]*a.ndim
+    index[axis] = slice(start, stop)
+    return a[tuple(index)]
+
+
+def _finite_difference(values, axis, h, order):
+    '''
+    Derivative along axis by central differences of order in the interior
+    and one-sided differences of the same order near the boundary.
+    '''
+    n = values.shape[axis]
+    p = order//2
+    out = empty_like(values)
+    # Interior points, the stencil shifts whole slices
+    interior = _view(out, axis, p, n - p)
+    interior[...] = 0
+    for k, w in zip(range(-p, p + 1), _stencil(range(-p, p + 1))):
+        if w:
+            interior += w*_view(values, axis, p + k, n - p + k)
+    # Boundary points use order+1 points inside the grid
+    for i in range(p):
+        for j, offsets in ((i, range(-i, order + 1 - i)),
+                           (n - 1 - i, range(i - order, i + 1))):
+            target = _view(out, axis, j, j + 1)
+            target[...] = 0
+            for k, w in zip(offsets, _stencil(offsets)):
+                target += w*_view(values, axis, j + k, j + k + 1)
+    out /= h
+    return out
+
+
+def _spectral_derivative(values, axis, length):
+    '''Derivative along axis of periodic data with period length by FFT.'''
+    n = values.shape[axis]
+    k = 2*pi*rfftfreq(n, length/n)
+    # Nyquist mode of even n has no derivative
+    if n % 2 == 0:
+        k[-1] = 0
+    shape = [1]*values.ndim
+    shape[axis] = len(k)
+    return irfft(1j*k.reshape(shape)*rfft(values, axis=axis), n, axis=axis)
+
+
+class GridFunction(object):
+    '''
+    Scalar, vector or tensor field sampled on Grid. Values are an array
+    whose shape is the field shape followed by the grid shape.
+    '''
+
+    def __init__(self, values, grid):
+        values = asarray(values, dtype=float)
+        assert values.shape[values.ndim - grid.tdim:] == grid.shape, \
+            'Values do not match grid'
+        self.values = values
+        self.grid = grid
+
+    @property
+    def rank(self):
+        '''0 for scalar, 1 for vector, 2 for tensor.'''
+        return self.values.ndim - self.grid.tdim
+
+    @property
+    def shape(self):
+        '''Shape of the field.'''
+        return self.values.shape[:self.rank]
+
+    def __len__(self):
+        '''Number of components (rows).'''
+        assert self.rank > 0, 'Scalar has no length'
+        return self.shape[0]
+
+    def __getitem__(self, i):
+        '''Component (row) i, no copy.'''
+        assert self.rank > 0, 'Scalar has no components'
+        return GridFunction(self.values[i], self.grid)
+
+    def component(self, i):
+        '''Slice i of the last field index, no copy.'''
+        index = (slice(None), )*(self.rank - 1) + (i, )
+        return GridFunction(self.values[index], self.grid)
+
+    def _values(self, other):
+        '''Values of other GridFunction on the same grid, or number.'''
+        if isinstance(other, GridFunction):
+            assert other.grid == self.grid, 'Functions on different grids'
+            return other.values
+        return other
+
+    def __add__(self, other):
+        return GridFunction(self.values + self._values(other), self.grid)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return GridFunction(self.values - self._values(other), self.grid)
+
+    def __rsub__(self, other):
+        return GridFunction(self._values(other) - self.values, self.grid)
+
+    def __neg__(self):
+        return GridFunction(-self.values, self.grid)
+
+    def __mul__(self, other):
+        '''Product with number or scalar GridFunction.'''
+        if isinstance(other, GridFunction):
+            assert self.rank == 0 or other.rank == 0, 'Only scalar products'
+        elif not isinstance(other, (int, float)):
+            return NotImplemented
+        return GridFunction(self.values*self._values(other), self.grid)
+
+    __rmul__ = __mul__
+
+    def __div__(self, other):
+        '''Division by number.'''
+        assert isinstance(other, (int, float)), 'Only division by number'
+        return GridFunction(self.values/float(other), self.grid)
+
+    __truediv__ = __div__
+
+    def integrate(self):
+        '''Integral over the grid domain, number or array of field shape.'''
+        return self.grid.integrate(self.values)
+
+    def Dx(self, i):
+        '''Partial derivative w.r.t coordinate i.'''
+        grid = self.grid
+        axis = self.rank + i
+        if grid.spectral:
+            a, b = grid.intervals[i]
+            values = _spectral_derivative(self.values, axis, b - a)
+        else:
+            values = _finite_difference(self.values, axis, grid.h[i],
+                                        grid.order)
+        return GridFunction(values, grid)
+
+
+def Dx_grid(u, i):
+    '''Partial derivative of GridFunction w.r.t coordinate i (0, 1, 2).'''
+    return u.Dx(i)
+
+
+def grad_grid(u):
+    '''Gradient of GridFunction, the derivative index is the last one.'''
+    return GridFunction(stack([u.Dx(i).values for i in range(u.grid.tdim)],
+                              axis=u.rank), u.grid)
+
+
+def div_grid(u):
+    '''Divergence of GridFunction over the last index.'''
+    assert u.rank > 0 and u.shape[-1] == u.grid.tdim, \
+        'Only divergence of vector or tensor allowed.'
+    return sum((u.component(i).Dx(i) for i in range(1, u.grid.tdim)),
+               u.component(0).Dx(0))
+
+
+def curl_grid(u):
+    '''Curl of 3d vector GridFunction --> vector, 2d --> scalar.'''
+    assert u.rank == 1 and len(u) == u.grid.tdim, 'Need vector for curl'
+    if len(u) == 2:
+        return u[1].Dx(0) - u[0].Dx(1)
+    return GridFunction(stack([(u[2].Dx(1) - u[1].Dx(2)).values,
+                               (u[0].Dx(2) - u[2].Dx(0)).values,
+                               (u[1].Dx(0) - u[0].Dx(1)).values]), u.grid)
+
+
+def rot_grid(u, orientation='+'):
+    '''Rotation of 2d scalar GridFunction --> vector.'''
+    assert u.rank == 0 and u.grid.tdim == 2, 'Can only take rot of 2d scalar'
+    sign = 1 if orientation == '+' else -1
+    return GridFunction(stack([-sign*u.Dx(1).values, sign*u.Dx(0).values]),
+                        u.grid)
+
+
+def laplace_grid(u):
+    '''Laplacian of scalar or vector GridFunction.'''
+    return div_grid(grad_grid(u))
+
+# -----------------------------------------------------------------------------
+
+
+if __name__ == '__main__':
+    from numpy import sin, cos, abs
+
+    grid = Grid([[0, 2*pi], [0, 2*pi]], 32, periodic=True, spectral=True)
+    u = grid.sample(lambda x, y: sin(x)*cos(y))
+    # Spectral accuracy
+    print abs(laplace_grid(u).values + 2*u.values).max()
+    print u.integrate(), (u*u).integrate() - pi**2
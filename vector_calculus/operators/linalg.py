@@ -1,15 +1,27 @@
 from vector_calculus.containers import *
-from sympy import Rational
-from numpy import eye
+from sympy import Rational, S
+from autodiff import is_field, tr_field, transpose_field, sym_field
+from autodiff import skew_field, deviatoric_field, inner_field, dot_field
 
 
 def tr(A):
     'Trace of tensor.'
-    return sum(A[i][i] for i in range(len(A)))
+    if is_field(A):
+        return tr_field(A)
+    if isinstance(A, SkewTensor):
+        return S(0)
+    return add_terms(A[i][i] for i in range(len(A)))
 
 
 def transpose(A):
     'Return transpose of A.'
+    if is_field(A):
+        return transpose_field(A)
+    # Structured tensors are their own transposes up to sign
+    if isinstance(A, SymTensor):
+        return A
+    elif isinstance(A, SkewTensor):
+        return -A
     n = len(A)
     blocks = [[] for i in range(n)]
     for row in A:
@@ -19,24 +31,42 @@ def transpose(A):
 
 
 def sym(A):
-    'Return symmetrized tensor from A.'
-    return Rational(1, 2)*(A+transpose(A))
+    'Return symmetrized tensor from A. Only the upper triangle is computed.'
+    if is_field(A):
+        return sym_field(A)
+    if isinstance(A, SymTensor):
+        return A
+    n = len(A)
+    if isinstance(A, SkewTensor):
+        return DiagTensor([0]*n)
+    return SymTensor([[Rational(1, 2)*(A[i][j] + A[j][i]) if i <= j else 0
+                       for j in range(n)] for i in range(n)])
 
 
 def skew(A):
-    'Return skew symmetrized tensor from A.'
-    return Rational(1, 2)*(A-transpose(A))
+    'Return skew symmetrized tensor from A. Only upper triangle is computed.'
+    if is_field(A):
+        return skew_field(A)
+    if isinstance(A, SkewTensor):
+        return A
+    n = len(A)
+    if isinstance(A, SymTensor):
+        return SkewTensor([[0]*n]*n)
+    return SkewTensor([[Rational(1, 2)*(A[i][j] - A[j][i]) if i < j else 0
+                        for j in range(n)] for i in range(n)])
 
 
 def Id(n):
     'Idenity in R^n'
-    return Tensor(eye(n))
+    return DiagTensor([1]*n)
 
 
 def deviatoric(A):
     'Return deviatoric part of A.'
+    if is_field(A):
+        return deviatoric_field(A)
     n = len(A)
-    return A - tr(A)*Id(n)/n
+    return A - Id(n)*(tr(A)*Rational(1, n))
 
 
 def commutator(A, B):
@@ -47,6 +77,10 @@ def commutator(A, B):
 
 def det(A):
     'Determinant of A.'
+    if isinstance(A, DiagTensor):
+        return reduce(lambda a, b: a*b, A.components)
+    elif isinstance(A, SkewTensor):
+        return A[0][1]**2 if len(A) == 2 else S(0)
     return A.as_matrix().det()
 
 
@@ -84,18 +118,38 @@ def outer(u, v):
 
 def inner(u, v):
     'Inner product of two vectors or two tensors --> number.'
+    if is_field(u) and is_field(v):
+        return inner_field(u, v)
     assert all(isinstance(arg, Vector) for arg in (u, v)) or \
         all(isinstance(arg, Tensor) for arg in (u, v)),\
         'Arguments must be two vectors or two tensors'
 
     if isinstance(u, Vector):
-        return sum((ui*vi for ui, vi in zip(u, v)))
-    else:
-        return tr(transpose(u)*v)
+        return add_terms(ui*vi for ui, vi in zip(u, v))
+    # Structured tensors only need their independent components
+    n = len(u)
+    if isinstance(v, DiagTensor):
+        u, v = v, u
+    if isinstance(u, DiagTensor):
+        return add_terms(d*v[i][i] for i, d in enumerate(u.components))
+    elif isinstance(u, SymTensor) and isinstance(v, SymTensor):
+        return add_terms([u[i][i]*v[i][i] for i in range(n)] +
+                         [2*u[i][j]*v[i][j]
+                          for i in range(n) for j in range(i+1, n)])
+    elif isinstance(u, SkewTensor) and isinstance(v, SkewTensor):
+        return add_terms(2*u[i][j]*v[i][j]
+                         for i in range(n) for j in range(i+1, n))
+    elif isinstance(u, (SymTensor, SkewTensor)) and \
+            isinstance(v, (SymTensor, SkewTensor)):
+        return S(0)
+    return add_terms(uij*vij for ui, vi in zip(u, v)
+                     for uij, vij in zip(ui, vi))
 
 
 def dot(A, u):
     'Dot product between vector/tensor and vector/tensor.'
+    if is_field(A) and is_field(u):
+        return dot_field(A, u)
     assert isinstance(A, (Vector, Tensor)) and isinstance(A, (Vector, Tensor)),\
         'Dot product is between vector and tensors'
     
@@ -103,6 +157,8 @@ def dot(A, u):
     if isinstance(A, Tensor):
         assert isinstance(u, Vector), 'A is Tensor but u in not a Vector'
         assert len(A) == len(u), 'Incompatible dimension'
+        if isinstance(A, DiagTensor):
+            return Vector([d*ui for d, ui in zip(A.components, u)])
         return Vector([inner(Ai, u) for Ai in A])
     # u.A is defined via transpose. We only have a row vector
     else:
@@ -0,0 +1,44 @@
+from vector_calculus.measures import *
+from vector_calculus.containers import Vector
+from sympy import symbols, S
+import unittest
+
+
+class TestAsynchronous(unittest.TestCase):
+    '''UnitTest of measures/asynchronous functionality.'''
+
+    def test_integrator(self):
+        x, y = symbols('x, y')
+        dx = dV([[0, 1], [0, 2]])
+        with AsyncIntegrator(Executor(2)) as integrator:
+            # Identical requests share computation
+            a, b, c = integrator.map([(x**2*y, dx), (x**2*y, dx), (x, dx)])
+            self.assertTrue(a._integral is b._integral)
+            self.assertEqual([a.result(), b.result(), c.result()],
+                             [S(2)/3, S(2)/3, 1])
+            # Errors of integration are raised by result
+            future = dx.aintegrate(Vector([x, y, 1]), integrator=integrator)
+            self.assertRaises(AssertionError, future.result)
+            # Callbacks
+            values = []
+            future = dx.aintegrate(y, integrator=integrator)
+            future.add_done_callback(lambda f: values.append(f.result()))
+            future.result()
+            future.add_done_callback(lambda f: values.append(f.result()))
+            self.assertEqual(values[-1], 2)
+
+    def test_cancel(self):
+        x, y = symbols('x, y')
+        dx = dV([[0, 1], [0, 2]])
+        with AsyncIntegrator(Executor(1)) as integrator:
+            a = integrator.submit(x*y**3, dx)
+            b = integrator.submit(x*y**3, dx)
+            if a.cancel():
+                self.assertRaises(CancelledError, a.result)
+            # The other request still gets its value
+            self.assertEqual(b.result(), 2)
+
+# -----------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    unittest.main()
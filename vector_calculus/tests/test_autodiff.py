@@ -0,0 +1,56 @@
+from vector_calculus.containers import Vector
+from vector_calculus.operators import *
+from sympy import symbols, sin, cos, exp, atan2, sqrt
+import numpy as np
+import unittest
+
+
+class TestAutodiff(unittest.TestCase):
+    '''UnitTest of operators/autodiff functionality.'''
+
+    def setUp(self):
+        x, y, z = symbols('x, y, z')
+        self.u = Vector([sin(x*y), x**2*exp(z), cos(x + z)*y])
+        self.f = lambdify_field(self.u)
+        np.random.seed(3)
+        self.X = np.random.rand(3, 50)
+
+    def assertField(self, numeric, symbolic):
+        self.assertTrue(np.allclose(numeric(*self.X),
+                                    lambdify_field(symbolic)(*self.X)))
+
+    def test_first(self):
+        u, f = self.u, self.f
+        self.assertField(grad(f), grad(u))
+        self.assertField(div(f), div(u))
+        self.assertField(curl(f), curl(u))
+        self.assertField(Dx(f, symbols('y')), Dx(u, symbols('y')))
+        # Numpy functions of the coordinates
+        g = lambda x, y: np.arctan2(y, x)*np.sqrt(x**2 + y**2)
+        x, y = symbols('x, y')
+        self.assertTrue(np.allclose(
+            rot(g)(*self.X[:2]),
+            lambdify_field(rot(atan2(y, x)*sqrt(x**2 + y**2)),
+                           (x, y))(*self.X[:2])))
+
+    def test_nested(self):
+        u, f = self.u, self.f
+        self.assertField(div(sym(grad(f))), div(sym(grad(u))))
+        self.assertField(laplace(f), laplace(u))
+        self.assertField(grad(div(f)), grad(div(u)))
+        self.assertField(tr(grad(grad(div(f)))), tr(grad(grad(div(u)))))
+        self.assertField(inner(grad(f), skew(grad(f))),
+                         inner(grad(u), skew(grad(u))))
+        self.assertField(dot(grad(f), f), dot(grad(u), u))
+
+    def test_constant(self):
+        # Constant components broadcast to the points
+        f = lambda x, y: [x**2, 1.]
+        x, zero = self.X[0], np.zeros_like(self.X[0])
+        self.assertTrue(np.allclose(grad(f)(*self.X[:2]),
+                                    [[2*x, zero], [zero, zero]]))
+
+# -----------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    unittest.main()
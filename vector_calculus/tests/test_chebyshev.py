@@ -0,0 +1,55 @@
+from vector_calculus.measures import *
+from vector_calculus.containers import Vector
+from vector_calculus.operators import lambdify_field
+from sympy import symbols, sin, cos, exp
+import numpy as np
+import unittest
+
+
+class TestChebyshev(unittest.TestCase):
+    '''UnitTest of Chebyshev surrogates.'''
+
+    def test_scalar(self):
+        x, y = symbols('x, y')
+        f = exp(sin(3*x))*cos(y)
+        dx = dV([[0, 1], [-1, 2]])
+        g = dx.surrogate(f)
+        self.assertTrue(g.error < 1E-8)
+        # Degree is chosen per axis
+        self.assertTrue(g.degrees[0] > g.degrees[1])
+        X = np.random.RandomState(1).rand(2, 100)
+        X[1] = 3*X[1] - 1
+        self.assertTrue(np.allclose(g(*X), lambdify_field(f, (x, y))(*X)))
+        self.assertAlmostEqual(g*dx, dx.quadrature(f, degree=40))
+        # Against weights
+        for w in (x, x*y**2):
+            self.assertAlmostEqual(g.integrate(w), dx.quadrature(w*f, degree=40))
+        # Derivatives
+        dg = lambdify_field(f.diff(x), (x, y))(*X)
+        self.assertTrue(np.allclose(g.diff(0)(*X), dg))
+
+    def test_vector(self):
+        x, y, z = symbols('x, y, z')
+        u = Vector([x*y, z**2, exp(x)])
+        g = ChebyshevSurrogate(u, Box([0, 1], [0, 1], [0, 2]))
+        self.assertEqual(g.rank, 1)
+        self.assertTrue(np.allclose(g.integrate(),
+                                    [1/2., 8/3., 2*(np.e - 1)]))
+        self.assertEqual(g(0.5, 0.5, 1.).shape, (3, ))
+
+    def test_domain(self):
+        x, y = symbols('x, y')
+        # Only cartesian domains or intervals
+        self.assertRaises(AssertionError, ChebyshevSurrogate, x*y,
+                          Triangle([0, 0], [1, 0], [0, 1]))
+        self.assertRaises(AssertionError, ChebyshevSurrogate, x*y,
+                          [[0, 1, 2], [0, 1]])
+        self.assertRaises(AssertionError,
+                          dV([0, 0], [1, 0], [0, 1]).surrogate, x*y)
+        g = ChebyshevSurrogate(x*y, ([0, 1], (0, 2)))
+        self.assertEqual(g.intervals, ((0., 1.), (0., 2.)))
+
+# -----------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+from vector_calculus.containers import Vector
+from vector_calculus.operators import *
+from sympy import symbols, simplify, sin, cos, S
+import unittest
+
+
+class TestOperatorCoordinates(unittest.TestCase):
+    '''UnitTest of operators/coordinates functionality.'''
+
+    def test_scale_factors(self):
+        # Computed and simplified
+        r, theta = symbols('r, theta', positive=True)
+        system = CoordinateSystem((r, theta), (r*cos(theta), r*sin(theta)))
+        self.assertEqual(system.h, (1, r))
+        self.assertEqual(Spherical().H, Spherical().coordinates[0]**2*
+                         sin(Spherical().coordinates[1]))
+
+    def test_spherical(self):
+        system = Spherical()
+        r, theta, phi = system.coordinates
+        self.assertEqual(grad(r**2, system=system), Vector([2*r, 0, 0]))
+        self.assertEqual(div(Vector([r, 0, 0]), system), S(3))
+        self.assertEqual(simplify(laplace(1/r, system)), 0)
+        f = r**2*sin(theta)*phi
+        self.assertEqual(curl(grad(f, system=system), system), Vector([0, 0, 0]))
+
+    def test_cylindrical(self):
+        system = Cylindrical()
+        r, theta, z = system.coordinates
+        # Rigid rotation
+        u = Vector([0, r, 0])
+        self.assertEqual(curl(u, system), Vector([0, 0, 2]))
+        self.assertEqual(laplace(u, system), Vector([0, 0, 0]))
+
+    def test_polar(self):
+        # r^2 e_r is r*(x, y) whose cartesian laplacian is 3*e_r
+        system = Polar()
+        r, theta = system.coordinates
+        u = laplace(Vector([r**2, 0]), system)
+        self.assertEqual(Vector([simplify(ui) for ui in u]), Vector([3, 0]))
+        # Cartesian laplacian of x**2 + y**2 is 4
+        x, y = symbols('x, y')
+        f = simplify(system.from_cartesian(x**2 + y**2))
+        self.assertEqual(f, r**2)
+        self.assertEqual(simplify(laplace(f, system)), 4)
+
+    def test_cartesian(self):
+        x, y, z = symbols('x, y, z')
+        u = Vector([x**2*y, y*z, x*z**3])
+        system = Cartesian()
+        self.assertEqual(div(u, system), div(u))
+        self.assertEqual(curl(u, system), curl(u))
+        self.assertEqual(laplace(u, system), laplace(u))
+        self.assertEqual(laplace(x**2*y + z), 2*y)
+
+# -----------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    unittest.main()
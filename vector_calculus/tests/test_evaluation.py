@@ -0,0 +1,67 @@
+from vector_calculus.containers import Tensor, Vector
+from vector_calculus.operators import *
+from vector_calculus.measures import Triangle
+from sympy import symbols, sin, cos, exp
+from numpy import array
+from threading import Thread
+import unittest
+
+
+class TestOperatorEvaluation(unittest.TestCase):
+    '''UnitTest of operators/evaluation functionality.'''
+
+    def test_lambdify_field(self):
+        x, y = symbols('x, y')
+        A = lambdify_field(Tensor([[x, 1], [x*y, 0]]), (x, y))
+        values = A(array([1., 2.]), 3.)
+        self.assertEqual(values.shape, (2, 2, 2))
+        self.assertEqual(values[1, 0].tolist(), [3., 6.])
+        self.assertEqual(values[0, 1].tolist(), [1., 1.])
+
+    def test_cse(self):
+        x, y = symbols('x, y')
+        u = Vector([sin(x*y)*exp(x), sin(x*y)*exp(x)*y])
+        values = lambdify_field(u, (x, y))(array([1., 2.]), 3.)
+        self.assertAlmostEqual(values[1, 1], sin(6.)*exp(2.)*3)
+
+    def test_compile_field(self):
+        x, y = symbols('x, y')
+        fields = [x**k*y for k in range(300)]
+        values = {}
+
+        def compile_all(i):
+            values[i] = [compile_field(f, (x, y))(2., 1.) for f in fields]
+        # Threads fill and clear the cache concurrently
+        threads = [Thread(target=compile_all, args=(i, )) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        expected = [2.**k for k in range(300)]
+        self.assertEqual([values[i] for i in range(4)], [expected]*4)
+
+    def test_allclose(self):
+        x, y, z = symbols('x, y, z')
+        # Scalars, equal but not structurally
+        f = sin(x)**2 + cos(x)**2
+        self.assertTrue(f != 1)
+        self.assertTrue(allclose(f, 1))
+        self.assertTrue(allclose(f, 1, simplify=True))
+        self.assertFalse(allclose(f, 1.1))
+
+        # Vectors over triangle
+        u = grad(exp(x+y))
+        v = Vector([exp(x)*exp(y), exp(x)*exp(y)])
+        self.assertTrue(allclose(u, v, Triangle([0, 0], [1, 0], [0, 1])))
+
+        # Vectors over box, shape mismatch
+        u = Vector([x*y*z**2, y*sin(x), z])
+        self.assertTrue(allclose(curl(curl(u)),
+                                 grad(div(u), dim=3) - div(grad(u, dim=3)),
+                                 [[-1, 1], [0, 2], [3, 4]]))
+        self.assertFalse(allclose(u, grad(u)))
+
+# -----------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    unittest.main()
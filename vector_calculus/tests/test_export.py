@@ -0,0 +1,101 @@
+from vector_calculus.measures import *
+from vector_calculus.containers import Vector
+from vector_calculus.operators import lambdify_field
+from sympy import symbols
+from numpy import array, frombuffer, load, arange, allclose
+from tempfile import mkdtemp
+from shutil import rmtree
+import unittest
+import re
+import os
+
+
+def read_vtu(path):
+    '''Arrays of VTK XML file with raw appended data by their names.'''
+    data = open(path, 'rb').read()
+    start = data.index('<AppendedData encoding="raw">')
+    start = data.index('_', start) + 1
+    arrays = {}
+    types = {'Float64': '<f8', 'Int64': '<i8', 'UInt8': 'u1'}
+    for vtype, name, ncomp, offset in re.findall(
+            r'type="(\w+)" Name="(\w+)" NumberOfComponents="(\d+)" '
+            r'format="appended" offset="(\d+)"', data[:start]):
+        offset = start + int(offset)
+        nbytes = int(frombuffer(data[offset:offset+8], dtype='<u8')[0])
+        a = frombuffer(data[offset+8:offset+8+nbytes], dtype=types[vtype])
+        arrays[name] = a.reshape((-1, int(ncomp)))
+    return arrays
+
+
+class TestExport(unittest.TestCase):
+    '''UnitTest of binary export.'''
+
+    def setUp(self):
+        self.tmp = mkdtemp()
+
+    def tearDown(self):
+        rmtree(self.tmp)
+
+    def test_vtu(self):
+        x, y = symbols('x, y')
+        points = array([[0, 0], [1, 0], [0, 1], [1, 1]], dtype=float)
+        cells = array([[0, 1, 2], [1, 3, 2]])
+        # Field-first values from lambdify_field are given point-major
+        u = lambdify_field(Vector([x, x*y]), (x, y))(*points.T).T
+        path = os.path.join(self.tmp, 'mesh.vtu')
+        write_vtu(path, points, cells, {'u': u}, {'id': [0., 1.]})
+        arrays = read_vtu(path)
+        self.assertTrue(allclose(arrays['Points'][:, :2], points))
+        self.assertTrue(allclose(arrays['u'], u))
+        # No guessing of orientation
+        self.assertRaises(AssertionError, write_vtu, path, points, cells,
+                          {'u': u.T})
+        self.assertEqual(arrays['connectivity'].tolist(), cells.tolist())
+        self.assertEqual(arrays['offsets'].flatten().tolist(), [3, 6])
+        self.assertEqual(arrays['types'].flatten().tolist(), [5, 5])
+
+        # Streaming chunks in any order
+        path = os.path.join(self.tmp, 'stream.vtu')
+        with VTUWriter(path, 10, point_data={'f': ()}) as writer:
+            writer.write_point_data('f', arange(5, 10))
+            for start in (0, 5):
+                writer.write_points(arange(start, start+5))
+            writer.write_point_data('f', arange(5))
+        arrays = read_vtu(path)
+        self.assertEqual(arrays['Points'][:, 0].tolist(), range(10))
+        self.assertEqual(arrays['f'].flatten().tolist(), range(5, 10) + range(5))
+        self.assertEqual(arrays['connectivity'].flatten().tolist(), range(10))
+
+    def test_export_set(self):
+        x, y, z = symbols('x, y, z')
+        tri = Triangle([0, 0, 0], [1, 0, 0], [0, 1, 1])
+        for name in ('tri.vtu', 'tri.npz'):
+            export_set(os.path.join(self.tmp, name), tri, 4, {'f': x + z})
+        arrays = read_vtu(os.path.join(self.tmp, 'tri.vtu'))
+        npz = load(os.path.join(self.tmp, 'tri.npz'))
+        self.assertTrue(allclose(arrays['Points'], npz['points']))
+        self.assertTrue(allclose(arrays['n'], npz['point_data/n']))
+        self.assertEqual(arrays['connectivity'].shape, (9, 4))
+        self.assertEqual(npz['cells'].shape, (9, 4))
+        self.assertTrue(allclose(npz['point_data/f'],
+                                 npz['points'][:, 0] + npz['points'][:, 2]))
+
+    def test_export_vector_field(self):
+        x, y, z = symbols('x, y, z')
+        # Number of points equals number of components
+        segment = Line([0, 0, 0], [1, 2, 3])
+        u = Vector([x, y, 2*z])
+        for name in ('line.vtu', 'line.npz'):
+            export_set(os.path.join(self.tmp, name), segment, 3, {'u': u})
+        arrays = read_vtu(os.path.join(self.tmp, 'line.vtu'))
+        npz = load(os.path.join(self.tmp, 'line.npz'))
+        points = npz['points']
+        expected = points*array([1, 1, 2])
+        self.assertEqual(npz['point_data/u'].shape, (3, 3))
+        self.assertTrue(allclose(npz['point_data/u'], expected))
+        self.assertTrue(allclose(arrays['u'], expected))
+
+# -----------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+from vector_calculus.containers import Vector
+from vector_calculus.operators import *
+from vector_calculus.measures import Rectangle, Box, dV
+from sympy import symbols, sin, cos, exp, pi
+import numpy as np
+import unittest
+
+
+class TestGrid(unittest.TestCase):
+    '''UnitTest of operators/grid functionality.'''
+
+    def test_finite_differences(self):
+        x, y, z = symbols('x, y, z')
+        u = Vector([sin(x*y), x**2*exp(z), cos(x + z)*y])
+        grid = Grid(Box([0, 1], [0, 1], [0, 1]), 41)
+        U = grid.sample(u)
+        # 4th order differences
+        for op in (grad, div, curl):
+            error = np.abs(op(U).values - grid.sample(op(u)).values).max()
+            self.assertTrue(error < 1E-5)
+        error = np.abs(Dx(U[0], y).values - grid.sample(Dx(u[0], y)).values)
+        self.assertTrue(error.max() < 1E-5)
+        # Higher order is more accurate
+        error4 = np.abs(div(U).values - grid.sample(div(u)).values).max()
+        grid6 = Grid(Box([0, 1], [0, 1], [0, 1]), 41, order=6)
+        error6 = np.abs(div(grid6.sample(u)).values -
+                        grid6.sample(div(u)).values).max()
+        self.assertTrue(error6 < error4)
+
+    def test_spectral(self):
+        x, y = symbols('x, y')
+        f = sin(x)*cos(2*y)
+        grid = Grid([[0, 2*pi], [0, 2*pi]], 24, periodic=True,
+                    spectral=True)
+        F = grid.sample(f)
+        self.assertTrue(np.allclose(laplace(F).values, -5*F.values))
+        self.assertTrue(np.allclose(rot(F).values, grid.sample(rot(f)).values))
+        # Quadrature of periodic data
+        self.assertAlmostEqual((F*F).integrate(), float(pi**2))
+
+    def test_quadrature(self):
+        x, y = symbols('x, y')
+        f = exp(x)*y**3
+        grid = Grid(Rectangle([0, 1], [1, 2]), (20, 21))
+        exact = float(f*dV([[0, 1], [1, 2]]))
+        self.assertAlmostEqual(grid.sample(f)*dV([[0, 1], [1, 2]]), exact, 6)
+        # Vector integrals are arrays
+        v = grid.sample(Vector([f, 1]))
+        self.assertTrue(np.allclose(v.integrate(), [exact, 1]))
+        # Grid data does not cover other domains
+        triangle = dV([0, 0], [1, 0], [0, 1])
+        self.assertRaises(AssertionError, lambda: grid.sample(f)*triangle)
+
+# -----------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
-from vector_calculus.containers import Tensor, Vector
+from vector_calculus.containers import Tensor, Vector, SymTensor, SkewTensor,\
+    DiagTensor
 from vector_calculus.operators import *
-from sympy import symbol
+from sympy import symbol, symbols, Integer
 import unittest
 import numpy as np
 
@@ -38,6 +39,29 @@ class TestOperatorLinalg(unittest.TestCase):
         trace = tr(Ad)
         self.assertAlmostEqual(abs(trace), 0)
 
+    def test_structured(self):
+        x, y = symbols('x, y')
+        A = Tensor([[x, x*y], [1, y**2]])
+        E, W = sym(A), skew(A)
+        self.assertTrue(isinstance(E, SymTensor))
+        self.assertTrue(isinstance(W, SkewTensor))
+        self.assertEqual(E + W, A)
+        self.assertEqual(E[0][1], E[1][0])
+        self.assertTrue(isinstance(2*E - Id(2), SymTensor))
+        self.assertEqual(inner(E, W), 0)
+        self.assertEqual((inner(E, E) - inner(Tensor(list(E)),
+                                              Tensor(list(E)))).expand(), 0)
+        self.assertEqual(transpose(W), -W)
+        # Identity is exact
+        self.assertTrue(all(isinstance(Iij, Integer) for row in Id(3)
+                            for Iij in row))
+        self.assertEqual(Id(2)*A, A)
+        self.assertEqual(A*Id(2), A)
+        D = DiagTensor([x, y])
+        self.assertEqual(det(D), x*y)
+        self.assertEqual(dot(D, Vector([1, 2])), Vector([x, 2*y]))
+        self.assertTrue(isinstance(D*D, DiagTensor))
+
     def test_cross(self):
         u_ = np.array([1, 2, 3])
         v_ = np.array([2, 0, -1])
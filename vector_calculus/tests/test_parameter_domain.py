@@ -0,0 +1,47 @@
+from vector_calculus.measures import ParameterDomain, dV
+from sympy import symbols, exp, sqrt
+from numpy import array
+import unittest
+
+
+class TestParameterDomain(unittest.TestCase):
+    '''UnitTest of ParameterDomain class.'''
+
+    def test_orders(self):
+        s, t, r = symbols('s, t, r')
+        # Nested bounds allow only one order
+        domain = ParameterDomain((s, (0, 1)), (t, (0, 1-s)), (r, (0, 1-s-t)))
+        self.assertEqual(domain.orders(), [(r, t, s)])
+        # Constant bounds allow all
+        domain = ParameterDomain((s, (0, 1)), (t, (0, 2)), (r, (-1, 1)))
+        self.assertEqual(len(domain.orders()), 6)
+
+    def test_plan(self):
+        s, t, r = symbols('s, t, r')
+        domain = ParameterDomain((s, (0, 1)), (t, (0, 2)))
+        # Default is reversed order of definition
+        self.assertEqual([var for var, bounds in domain.plan(s*t)], [t, s])
+        # Polynomial variable goes first
+        self.assertEqual([var for var, bounds in domain.plan(exp(t**2)*s)],
+                         [s, t])
+        # But not if the bounds do not allow it
+        domain = ParameterDomain((s, (0, 1)), (t, (0, 1-s)))
+        self.assertEqual([var for var, bounds in domain.plan(exp(t**2)*s)],
+                         [t, s])
+
+        x, y = symbols('x, y')
+        self.assertEqual(x*exp(y)*dV([[0, 2], [0, 1]]),
+                         2*(exp(1) - 1))
+
+    def test_from_unit_cube(self):
+        s, t = symbols('s, t')
+        domain = ParameterDomain((s, (0, 1)), (t, (0, sqrt(1-s**2))))
+        points, J = domain.from_unit_cube(array([[0.5, 0.5], [0.6, 1.]]))
+        self.assertAlmostEqual(points[1, 1], 0.8)
+        self.assertAlmostEqual(J[1], 0.8)
+        self.assertAlmostEqual(points[0, 1], 0.5*(0.75)**0.5)
+
+# -----------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    unittest.main()
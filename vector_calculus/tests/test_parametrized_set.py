@@ -0,0 +1,125 @@
+from vector_calculus.measures import *
+from vector_calculus.containers import Vector
+from sympy import symbols, sin, cos, pi, Matrix, sqrt, S
+from vector_calculus.containers.serialization import pack_expressions
+from numpy import array
+import numpy as np
+from threading import Thread
+import unittest
+
+
+class TestParametrizedSet(unittest.TestCase):
+    '''UnitTest of ParametrizedSet class.'''
+
+    def test_affine(self):
+        tri = Triangle([1, 0, 0], [0, 1, 0], [0, 0, 1])
+        A, b = tri.affine
+        self.assertEqual(A, Matrix([[-1, -1], [1, 0], [0, 1]]))
+        self.assertEqual(b, Matrix([1, 0, 0]))
+        self.assertEqual(tri.n, Vector([1, 1, 1]))
+        self.assertEqual(tri.J, sqrt(3))
+
+        x = tri.map_points(array([[0., 0.], [0.5, 0.5]]))
+        self.assertEqual(x.tolist(), [[1, 0, 0], [0, 0.5, 0.5]])
+
+        box = Box([0, 1], [1, 2], [2, 4])
+        self.assertEqual(box.J, 0.25)
+        x, y, z = symbols('x, y, z')
+        s, t, r = symbols('s, t, r')
+        self.assertEqual((box.substitute(x*z) - (s + 1)*(r + 3)/2).expand(), 0)
+
+        th = symbols('th')
+        arc = ParametrizedSet(ParameterDomain((th, (0, pi))), (sin(th), cos(th)))
+        self.assertTrue(arc.affine is None)
+        x = arc.map_points(array([[0.], [pi/2]]))
+        self.assertAlmostEqual(abs(x - array([[0, 1], [1, 0]])).max(), 0)
+
+    def test_serialization(self):
+        box = Box([0, 1], [1, 2], [2, 4])
+        other = ParametrizedSet.from_bytes(box.to_bytes())
+        self.assertTrue(isinstance(other, Box))
+        self.assertEqual(other.J, box.J)
+        # Vertices are stored as numbers
+        tri = Triangle([0., 0.], [1., 0.], [0., 0.5])
+        self.assertEqual(tri.__reduce__()[1][1].dtype, float)
+        self.assertEqual(Triangle.from_bytes(tri.to_bytes()).J, tri.J)
+        # Also from NumPy array
+        vertices = array([[0., 0.], [1., 0.], [0., 0.5]])
+        tri = SimplexSet(vertices)
+        self.assertEqual(tri.__reduce__()[1][1].dtype, float)
+        self.assertEqual(SimplexSet.from_bytes(tri.to_bytes()).J, tri.J)
+        self.assertEqual(pack_expressions(vertices.astype(int)).dtype, int)
+
+        th = symbols('th')
+        arc = ParametrizedSet(ParameterDomain((th, (0, pi))), (sin(th), cos(th)))
+        other = ParametrizedSet.from_bytes(arc.to_bytes())
+        self.assertEqual(other.tau, arc.tau)
+        self.assertEqual(other.pdomain[th], arc.pdomain[th])
+        dx = dV([[0, 1], [0, 2]]) + dV([0, 0], [1, 0], [0, 1])
+        x, y = symbols('x, y')
+        self.assertEqual(x*Measure.from_bytes(dx.to_bytes()), x*dx)
+
+    def test_memoize(self):
+        from vector_calculus.measures import measure
+        x, y, k = symbols('x, y, k')
+        clear_term_cache()
+        dx = dV([[0, 1], [0, 2]])
+        dx.memoize = True
+        f = k*x**2*y + 3*sin(x)*y
+        self.assertEqual((f*dx - f*dV([[0, 1], [0, 2]])).expand(), 0)
+        nterms = len(measure.__terms__)
+        # Same terms with other coefficients are not integrated again
+        self.assertEqual(((2*x**2*y - sin(x)*y)*dx).expand(),
+                         ((2*x**2*y - sin(x)*y)*dV([[0, 1], [0, 2]])).expand())
+        self.assertEqual(len(measure.__terms__), nterms)
+        # Terms of other domain are integrated
+        dy = dV([[0, 1], [0, 1]])
+        dy.memoize = True
+        self.assertEqual(x*y*dy, S(1)/4)
+        self.assertTrue(len(measure.__terms__) > nterms)
+
+        # Threads share the cache, which stays within its bound
+        max_terms, measure.__max_terms__ = measure.__max_terms__, 3
+        results = {}
+
+        def integrate_all(i):
+            results[i] = [x**n*y*dy for n in range(8)]
+        try:
+            clear_term_cache()
+            threads = [Thread(target=integrate_all, args=(i, ))
+                       for i in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(len(measure.__terms__), 3)
+        finally:
+            measure.__max_terms__ = max_terms
+        expected = [S(1)/(2*(n + 1)) for n in range(8)]
+        self.assertEqual([results[i] for i in range(8)], [expected]*8)
+
+    def test_sample(self):
+        # Sphere patch, normal is radial and J = sin(th)
+        th, phi = symbols('th, phi')
+        sphere = ParametrizedSet(ParameterDomain((th, (0.5, 1)), (phi, (0, 2))),
+                                 (sin(th)*cos(phi), sin(th)*sin(phi), cos(th)))
+        params, x, J, n, tau = sphere.sample(20, seed=1)
+        self.assertEqual(x.shape, (20, 3))
+        self.assertTrue(abs(n - x*J[:, None]).max() < 1E-12)
+        self.assertTrue(abs(J - np.sin(params[:, 0])).max() < 1E-12)
+        self.assertTrue(tau is None)
+        # Structured grid honours nested bounds of the triangle
+        tri = Triangle([0, 0], [2, 0], [0, 1])
+        params, x, J, n, tau = tri.sample_grid(5)
+        self.assertEqual(params.shape, (5, 5, 2))
+        self.assertTrue((params.sum(axis=2) <= 1 + 1E-12).all())
+        self.assertTrue(abs(J - 2).max() < 1E-12)
+        self.assertTrue(abs(x[-1] - [2, 0]).max() < 1E-12)
+        # Curve has tangent
+        params, x, J, n, tau = Line([0, 0, 0], [1, 2, 2]).sample_grid(3)
+        self.assertTrue(abs(J - 3).max() < 1E-12 and tau.shape == (3, 3))
+
+# -----------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+from vector_calculus.containers import Polynomial, Vector
+from vector_calculus.operators import *
+from vector_calculus.measures import CurveMeasure, SurfaceMeasure, Line
+from vector_calculus.measures import Triangle
+from sympy import symbols, S, sin
+from numpy import array
+import unittest
+
+
+class TestPolynomial(unittest.TestCase):
+    '''UnitTest of containers/polynomial functionality.'''
+
+    def test_algebra(self):
+        x, y, z = symbols('x, y, z')
+        p = Polynomial.from_expr(x**2*y + 3*z)
+        q = Polynomial.from_expr(x - S(1)/2)
+        self.assertEqual(p*q, ((x**2*y + 3*z)*(x - S(1)/2)).expand())
+        self.assertEqual((p - p).degree, -1)
+        self.assertEqual(q**3, ((x - S(1)/2)**3).expand())
+        # Polynomial wins over sympy numbers and polynomials
+        self.assertTrue(isinstance(S(2)*p + x, Polynomial))
+        # Other expressions fall back to sympy
+        self.assertEqual(p + sin(x), x**2*y + 3*z + sin(x))
+        self.assertEqual(p.diff(x), 2*x*y)
+        self.assertEqual(p(array([1., 2.]), 1., 1.).tolist(), [4., 7.])
+        # Equal polynomials and expressions hash alike
+        self.assertEqual(hash(Polynomial.from_expr(x*y)), hash(x*y))
+        f = (x**2*y + 3*z)*(x - S(1)/2)
+        self.assertEqual(len(set([p*q, f.expand()])), 1)
+        # Other expressions compare structurally, as in sympy
+        self.assertNotEqual(p*q, f)
+
+    def test_operators(self):
+        x, y, z = symbols('x, y, z')
+        u = Vector([x*y, y*z**2, x + z])
+        v = u.to_polynomial()
+        self.assertTrue(isinstance(div(v), Polynomial))
+        self.assertEqual(grad(v), grad(u))
+        self.assertEqual(div(v), div(u))
+        self.assertEqual(curl(v), curl(u))
+        A = grad(v)
+        self.assertTrue(isinstance(inner(A*A, A)*1, Polynomial))
+        self.assertEqual(inner(A*A, A), (inner(grad(u)*grad(u), grad(u))).expand())
+        self.assertEqual(det(A), det(grad(u)))
+        self.assertEqual(A.as_expr(), grad(u))
+
+    def test_measures(self):
+        x, y, z = symbols('x, y, z')
+        # Scalar integrands on curves and surfaces
+        p = Polynomial.from_expr(x*y + 1)
+        dl = CurveMeasure(Line([0, 0], [1, 1]))
+        self.assertEqual(p*dl, (x*y + 1)*dl)
+        ds = SurfaceMeasure(Triangle([0, 0, 0], [1, 0, 0], [0, 1, 1]))
+        self.assertEqual(p*ds, (x*y + 1)*ds)
+
+# -----------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,192 @@
+from vector_calculus.measures import *
+from vector_calculus.containers import Vector, Tensor
+from sympy import S, symbols, integrate, sin, cos, pi, sqrt, asinh, log
+from numpy.linalg import det
+from numpy import array, load, save
+from tempfile import mkdtemp
+from shutil import rmtree
+import unittest
+import os
+
+
+class TestQuadrature(unittest.TestCase):
+    '''UnitTest of numeric quadrature.'''
+
+    def test_simplex_rule(self):
+        # Exact for monomials s^i t^j over reference triangle
+        s, t = symbols('s, t')
+        points, weights = simplex_rule(2, 4)
+        for i, j in [(0, 0), (1, 3), (2, 2), (4, 0)]:
+            exact = integrate(s**i*t**j, (t, 0, 1-s), (s, 0, 1))
+            value = (points[:, 0]**i*points[:, 1]**j*weights).sum()
+            self.assertAlmostEqual(value, float(exact))
+
+    def test_cube_rule(self):
+        points, weights = cube_rule(3, 2)
+        self.assertAlmostEqual(weights.sum(), 8)
+        self.assertAlmostEqual((points[:, 2]**2*weights).sum(), 8/3.)
+
+    def test_nested_rule(self):
+        s, t, r = symbols('s, t, r')
+        # Affine nested bounds, exact
+        domain = ParameterDomain((s, (0, 2)), (t, (s, 2*s + 1)), (r, (0, s + t)))
+        points, weights = nested_rule(domain, 3)
+        exact = integrate(s*t*r, (r, 0, s + t), (t, s, 2*s + 1), (s, 0, 2))
+        self.assertAlmostEqual((points.prod(axis=1)*weights).sum(), float(exact))
+        # Curved bound, area of quarter disk
+        disk = ParametrizedSet(ParameterDomain((s, (0, 1)),
+                                               (t, (0, sqrt(1 - s**2)))), (s, t))
+        x, y = symbols('x, y')
+        self.assertAlmostEqual(VolumeMeasure(disk).quadrature(x**2 + y**2,
+                                                              degree=40),
+                               float(pi/8), 4)
+
+    def test_measure_quadrature(self):
+        x, y, z = symbols('x, y, z')
+        s, t = symbols('s, t')
+        # Volume, exact
+        dx = dV([0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1])
+        self.assertAlmostEqual(dx.quadrature(x*y**2, degree=3), 1/360.)
+        # Curved surface, area and flux of sphere
+        sphere = ParametrizedSet(ParameterDomain((s, (0, pi)), (t, (0, 2*pi))),
+                                 (sin(s)*cos(t), sin(s)*sin(t), cos(s)))
+        ds = SurfaceMeasure(sphere)
+        self.assertAlmostEqual(ds.quadrature(1, degree=20), 4*pi)
+        self.assertAlmostEqual(ds.quadrature(Vector([x, y, z]), degree=20),
+                               4*pi)
+        # Tensor flux through triangle is a vector
+        dS = SurfaceMeasure(Triangle([1, 0, 0], [0, 1, 0], [0, 0, 1]))
+        T = Tensor([[x, 0, 0], [0, y, 0], [0, 0, z]])
+        values = dS.quadrature(T, degree=1)
+        self.assertEqual(values.shape, (3, ))
+        self.assertAlmostEqual(abs(values - 1/6.).max(), 0)
+        # Circulation along circle
+        dL = CurveMeasure(ParametrizedSet(ParameterDomain((s, (0, 2*pi))),
+                                          (cos(s), sin(s))))
+        self.assertAlmostEqual(dL.quadrature(Vector([-y, x]), degree=20), 2*pi)
+
+    def test_field_integrals(self):
+        x, y, z = symbols('x, y, z')
+        # Vector and Tensor over volume, symbolic and numeric agree
+        dx = dV([0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1])
+        u = Vector([x, x*y, 1])
+        self.assertEqual(u*dx, Vector([S(1)/24, S(1)/120, S(1)/6]))
+        values = dx.quadrature(u, degree=2)
+        self.assertAlmostEqual(abs(values - [1/24., 1/120., 1/6.]).max(), 0)
+        dx = dV([[0, 1], [0, 2]])
+        A = Tensor([[x, y], [1, x*y]])
+        self.assertEqual(A*dx, Tensor([[1, 2], [2, 1]]))
+        self.assertAlmostEqual(abs(dx.quadrature(A) - [[1, 2], [2, 1]]).max(),
+                               0)
+        # Tensor flux through triangle
+        dS = SurfaceMeasure(Triangle([1, 0, 0], [0, 1, 0], [0, 0, 1]))
+        T = Tensor([[x, 0, 0], [0, y, 0], [0, 0, z]])
+        self.assertEqual(T*dS, Vector([S(1)/6]*3))
+
+    def test_sweep(self):
+        x, y, k, a = symbols('x, y, k, a')
+        dx = dV([[0, 1], [0, 2]])
+        ks = array([0.5, 1., 2.])
+        exact = [float((sin(k*x)*y*dx).subs(k, kk)) for kk in ks]
+        for symbolic in (False, True):
+            values = dx.sweep(sin(k*x)*y, [k], ks, degree=20,
+                              symbolic=symbolic)
+            self.assertAlmostEqual(abs(values - exact).max(), 0)
+        # Two parameters, vector integrand
+        values = dx.sweep(Vector([a*x, k*y]), [k, a], [[1, 2], [3, 4]])
+        self.assertEqual(values.shape, (2, 2))
+        self.assertAlmostEqual(abs(values - [[2, 2], [4, 6]]).max(), 0)
+
+    def test_mesh(self):
+        x, y, z = symbols('x, y, z')
+        f = x**2 + y*z
+        vertices = array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1],
+                          [1, 1, 1]], dtype=float)
+        cells = array([[0, 1, 2, 3], [1, 2, 3, 4]])
+        exact = [float(f*dV(*vertices[cell].tolist())) for cell in cells]
+
+        tmp = mkdtemp()
+        try:
+            paths = [os.path.join(tmp, name)
+                     for name in ('vertices.npy', 'cells.npy', 'out.npy')]
+            save(paths[0], vertices)
+            save(paths[1], cells)
+            vertices_, cells_ = load_mesh(paths[0], paths[1])
+
+            # Stream cell by cell to memmap
+            cell_integrals(f, vertices_, cells_, out=paths[2], chunk_size=1)
+            for value, value_ in zip(load(paths[2]), exact):
+                self.assertAlmostEqual(value, value_)
+            # Unicode paths too
+            cell_integrals(f, vertices_, cells_, out=unicode(paths[2]))
+            for value, value_ in zip(load(paths[2]), exact):
+                self.assertAlmostEqual(value, value_)
+
+            # Generator in one chunk
+            values = list(iter_cell_integrals(f, vertices_, cells_))
+            self.assertEqual(len(values), 1)
+            for value, value_ in zip(values[0], exact):
+                self.assertAlmostEqual(value, value_)
+        finally:
+            rmtree(tmp)
+
+    def test_qmc(self):
+        x, y, z = symbols('x, y, z')
+        f = x*y + z**2
+        for dx in (dV([[0, 1], [0, 2], [1, 3]]),
+                   dV([0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1])):
+            value, error = dx.qmc(f, tol=1E-4, seed=2)
+            self.assertTrue(error < 1E-4)
+            self.assertTrue(abs(value - float(f*dx)) < 10*error)
+
+    def test_adaptive(self):
+        x, y, z = symbols('x, y, z')
+        # Children cover the parent
+        for tdim in (1, 2, 3):
+            self.assertAlmostEqual(sum(abs(det(A))
+                                       for A, c in red_refinement(tdim)), 1)
+            self.assertAlmostEqual(sum(abs(det(A))
+                                       for A, c in bisection(tdim)), 1)
+        # Singular at a vertex of triangle
+        value, error = dV([0, 0], [1, 0], [0, 1]).adaptive(1/sqrt(x**2 + y**2),
+                                                           tol=1E-8)
+        self.assertTrue(error < 1E-8)
+        self.assertAlmostEqual(value, float(sqrt(2)*asinh(1)), 7)
+        # Singular at a corner of box
+        dx = dV([[0, 1], [0, 1], [0, 1]])
+        value, error = dx.adaptive(1/sqrt(x**2 + y**2 + z**2), tol=1E-6)
+        self.assertAlmostEqual(value, float(3*log((1+sqrt(3))/sqrt(2))-pi/4), 5)
+        # Smooth integrand needs no refinement
+        self.assertAlmostEqual(dx.adaptive(x*y*z)[0], 1/8.)
+
+    def test_parallel(self):
+        x, y, z = symbols('x, y, z')
+        f = sin(x*y)*z
+        dx = dV([[0, 1], [0, 2], [1, 3]])
+        # Same bits for any number of threads
+        values = []
+        for workers in (1, 2, 3):
+            with Executor(workers, chunk_size=50) as executor:
+                values.append(dx.quadrature(f, degree=10, executor=executor))
+        self.assertEqual(len(set(values)), 1)
+        self.assertAlmostEqual(values[0], dx.quadrature(f, degree=10))
+
+        # Pieces in processes
+        dx = sum([dV([[i, i+1], [0, 1]]) for i in range(1, 4)],
+                 dV([[0, 1], [0, 1]]))
+        with Executor(2, processes=True) as executor:
+            self.assertAlmostEqual(dx.quadrature(x*y, executor=executor), 4)
+
+        # Cells
+        vertices = array([[0, 0], [1, 0], [1, 1], [0, 1]], dtype=float)
+        cells = array([[0, 1, 2], [0, 2, 3]]*10)
+        with Executor(2) as executor:
+            values = cell_integrals(x*y, vertices, cells, chunk_size=3,
+                                    executor=executor)
+        self.assertEqual(values.tolist(),
+                         cell_integrals(x*y, vertices, cells).tolist())
+
+# -----------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,8 @@
-from vector_calculus.containers import Tensor
-from sympy import symbols, S
+from vector_calculus.containers import Tensor, set_interning
+from sympy import symbols, S, sin, cos
 from numpy import eye, array
 import unittest
+import pickle
 
 
 class TestTensor(unittest.TestCase):
@@ -49,6 +50,44 @@ class TestTensor(unittest.TestCase):
         B = Tensor([[1, 0], [0, 0]])
         self.assertEqual(A.subs({x: 1}), B)
 
+    def test_sum(self):
+        A = Tensor([[1, 2], [3, 4]])
+        B = Tensor([[1, 0], [0, 1]])
+        self.assertEqual(Tensor.sum([A, B, A]), A+B+A)
+
+    def test_hash(self):
+        x = symbols('x')
+        A = Tensor([[x, 0], [0, 1]])
+        self.assertEqual({A: 1}[Tensor([[x, 0], [0, 1]])], 1)
+        self.assertRaises(AttributeError, setattr, A, 'A', ())
+        self.assertNotEqual(A, Tensor([[x, 0, 0], [0, 1, 0], [0, 0, 1]]))
+        self.assertNotEqual(A, [[x, 0], [0, 1]])
+
+    def test_cse(self):
+        x, y = symbols('x, y')
+        A = Tensor([[sin(x*y)**2, cos(x*y)], [sin(x*y)**2*x, cos(x*y)*y]])
+        replacements, B = A.cse()
+        self.assertTrue(0 < len(replacements) <= 3)
+        for c, expr in reversed(replacements):
+            B = B.subs({c: expr})
+        self.assertEqual(A, B)
+
+    def test_serialization(self):
+        x = symbols('x')
+        A = Tensor([[x, 1], [2.5, x**2]])
+        self.assertEqual(Tensor.from_bytes(A.to_bytes()), A)
+        self.assertEqual(pickle.loads(pickle.dumps(A)), A)
+
+    def test_interning(self):
+        x = symbols('x')
+        set_interning(True)
+        try:
+            A = Tensor([[x, 0], [0, 1]])
+            self.assertTrue(A*A is Tensor([[x**2, 0], [0, 1]]))
+            self.assertTrue(A[1] is Tensor([[x, 1], [0, 1]])[1])
+        finally:
+            set_interning(False)
+
 
 # -----------------------------------------------------------------------------
 
@@ -1,5 +1,5 @@
 from vector_calculus.containers import Vector
-from sympy import symbols, S
+from sympy import symbols, S, Symbol
 import unittest
 
 
@@ -37,6 +37,47 @@ class TestVector(unittest.TestCase):
         v = Vector([s, t, r])
         self.assertEqual(v.subs({s: x, t: y, r: z}), u)
 
+    def test_sum(self):
+        x, y = symbols('x, y')
+        vectors = [Vector([x, i]) for i in range(4)] + [Vector([y, x])]
+        self.assertEqual(Vector.sum(vectors), Vector([4*x + y, 6 + x]))
+
+    def test_hash(self):
+        x, y = symbols('x, y')
+        u = Vector([x, 2*y])
+        self.assertEqual(hash(u), hash(Vector([x, y+y])))
+        self.assertEqual({u: 1}[Vector([x, 2*y])], 1)
+        self.assertRaises(AttributeError, setattr, u, 'u', (y, x))
+        # Vectors of other length or other types are never equal
+        z = symbols('z')
+        self.assertNotEqual(Vector([x, y]), Vector([x, y, z]))
+        self.assertNotEqual(Vector([x, y]), [x, y, 5])
+        self.assertEqual(len(set([Vector([x, y]), Vector([x, y, z])])), 2)
+
+    def test_cse(self):
+        x, y = symbols('x, y')
+        u = Vector([(x + y)**2, (x + y)**2*x])
+        replacements, v = u.cse()
+        self.assertEqual(len(replacements), 1)
+        self.assertEqual(v.subs(dict(replacements)), u)
+
+    def test_serialization(self):
+        x = symbols('x')
+        r = symbols('r', positive=True)
+        u = Vector([x*r, S(1)/3, 2])
+        v = Vector.from_bytes(u.to_bytes())
+        self.assertEqual(u, v)
+        self.assertTrue(v[0].atoms(Symbol) == set([x, r]))
+
+    def test_interning(self):
+        x, y = symbols('x, y')
+        Vector.interning = True
+        try:
+            self.assertTrue(Vector([x, y]) is Vector([x, y]))
+        finally:
+            Vector.interning = False
+        self.assertFalse(Vector([x, y]) is Vector([x, y]))
+
 # -----------------------------------------------------------------------------
 
 if __name__ == '__main__':